@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+"""
+Distributed Check Coordinator
+Shares the checking of a large watch set between workers on several hosts.
+Usernames are leased to one worker at a time; leases that are not renewed expire and go back to the queue.
+"""
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from colorama import Fore, init
+
+# Optional backends
+try:
+    import redis
+except ImportError:
+    redis = None
+
+try:
+    import psycopg
+except ImportError:
+    psycopg = None
+
+# Initialize colorama
+init(autoreset=True)
+
+class LeaseBackend(ABC):
+    """Shared store of usernames, leases and results - subclasses implement one storage system"""
+
+    def __init__(self, check_interval=120, interest_ttl=600):
+        self.check_interval = check_interval  # Seconds between checks of the same username
+        self.interest_ttl = interest_ttl  # Usernames nobody registered for this long are no longer checked
+
+    @abstractmethod
+    def register(self, usernames):
+        """Mark usernames as wanted, queueing new ones for an immediate check"""
+
+    @abstractmethod
+    def lease(self, worker_id, count, lease_seconds):
+        """Lease up to count due usernames to a worker, re-queueing expired leases first"""
+
+    @abstractmethod
+    def heartbeat(self, worker_id, usernames, lease_seconds):
+        """Extend the worker's leases on usernames it is still checking"""
+
+    @abstractmethod
+    def complete(self, worker_id, username, result):
+        """Store a result and schedule the next check; returns False if the lease was lost"""
+
+    @abstractmethod
+    def get_results(self, usernames):
+        """Return {username: (checked_at, result)} for usernames with a stored result"""
+
+class MemoryLeaseBackend(LeaseBackend):
+    """In-process stand-in for local testing - same semantics as the shared backends"""
+
+    def __init__(self, check_interval=120, interest_ttl=600):
+        super().__init__(check_interval, interest_ttl)
+        self.lock = threading.Lock()
+        self.entries = {}  # {username: {'next_due', 'owner', 'lease_expires', 'wanted_until'}}
+        self.results = {}  # {username: (checked_at, result)}
+
+    def register(self, usernames):
+        now = time.time()
+        with self.lock:
+            for username in usernames:
+                entry = self.entries.setdefault(username, {'next_due': now, 'owner': None, 'lease_expires': 0})
+                entry['wanted_until'] = now + self.interest_ttl
+
+    def lease(self, worker_id, count, lease_seconds):
+        now = time.time()
+        with self.lock:
+            available = [
+                (entry['next_due'], username) for username, entry in self.entries.items()
+                if entry['next_due'] <= now and entry['wanted_until'] > now
+                and (entry['owner'] is None or entry['lease_expires'] < now)
+            ]
+            leased = [username for _, username in sorted(available)[:count]]
+            for username in leased:
+                self.entries[username].update(owner=worker_id, lease_expires=now + lease_seconds)
+            return leased
+
+    def heartbeat(self, worker_id, usernames, lease_seconds):
+        now = time.time()
+        with self.lock:
+            for username in usernames:
+                entry = self.entries.get(username)
+                if entry and entry['owner'] == worker_id:
+                    entry['lease_expires'] = now + lease_seconds
+
+    def complete(self, worker_id, username, result):
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(username)
+            if not entry or entry['owner'] != worker_id or entry['lease_expires'] < now:
+                return False
+            entry.update(owner=None, lease_expires=0, next_due=now + self.check_interval)
+            self.results[username] = (now, result)
+            return True
+
+    def get_results(self, usernames):
+        with self.lock:
+            return {username: self.results[username] for username in usernames if username in self.results}
+
+class SQLLeaseBackend(LeaseBackend):
+    """Shared SQL schema for the SQLite and Postgres backends"""
+    placeholder = '?'
+
+    def _sql(self, query):
+        return query.replace('?', self.placeholder)
+
+    def _create_schema(self, cursor):
+        cursor.execute(
+            'CREATE TABLE IF NOT EXISTS lease_usernames ('
+            'username TEXT PRIMARY KEY, next_due DOUBLE PRECISION NOT NULL, owner TEXT, '
+            'lease_expires DOUBLE PRECISION NOT NULL DEFAULT 0, wanted_until DOUBLE PRECISION NOT NULL)'
+        )
+        cursor.execute(
+            'CREATE TABLE IF NOT EXISTS lease_results ('
+            'username TEXT PRIMARY KEY, checked_at DOUBLE PRECISION NOT NULL, result TEXT NOT NULL, worker TEXT)'
+        )
+
+    def _register(self, cursor, usernames):
+        now = time.time()
+        for username in usernames:
+            cursor.execute(self._sql(
+                'INSERT INTO lease_usernames (username, next_due, wanted_until) VALUES (?, ?, ?) '
+                'ON CONFLICT (username) DO UPDATE SET wanted_until = excluded.wanted_until'
+            ), (username, now, now + self.interest_ttl))
+
+    def _heartbeat(self, cursor, worker_id, usernames, lease_seconds):
+        now = time.time()
+        for username in usernames:
+            cursor.execute(self._sql(
+                'UPDATE lease_usernames SET lease_expires = ? WHERE username = ? AND owner = ?'
+            ), (now + lease_seconds, username, worker_id))
+
+    def _complete(self, cursor, worker_id, username, result):
+        now = time.time()
+        cursor.execute(self._sql(
+            'UPDATE lease_usernames SET owner = NULL, lease_expires = 0, next_due = ? '
+            'WHERE username = ? AND owner = ? AND lease_expires >= ?'
+        ), (now + self.check_interval, username, worker_id, now))
+        if cursor.rowcount != 1:
+            return False
+        cursor.execute(self._sql(
+            'INSERT INTO lease_results (username, checked_at, result, worker) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (username) DO UPDATE SET checked_at = excluded.checked_at, '
+            'result = excluded.result, worker = excluded.worker'
+        ), (username, now, json.dumps(result), worker_id))
+        return True
+
+    def _get_results(self, cursor, usernames):
+        results = {}
+        usernames = list(usernames)
+        for i in range(0, len(usernames), 500):
+            chunk = usernames[i:i + 500]
+            cursor.execute(self._sql(
+                f"SELECT username, checked_at, result FROM lease_results WHERE username IN ({', '.join('?' for _ in chunk)})"
+            ), chunk)
+            for username, checked_at, result in cursor.fetchall():
+                results[username] = (checked_at, json.loads(result))
+        return results
+
+class SQLiteLeaseBackend(SQLLeaseBackend):
+    """Leases in a SQLite file - for workers that share a filesystem path"""
+
+    def __init__(self, path, check_interval=120, interest_ttl=600):
+        super().__init__(check_interval, interest_ttl)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self._create_schema(self.connection.cursor())
+
+    def _transaction(self, operation, *args):
+        with self.lock:
+            cursor = self.connection.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                value = operation(cursor, *args)
+                cursor.execute('COMMIT')
+                return value
+            except Exception:
+                cursor.execute('ROLLBACK')
+                raise
+
+    def register(self, usernames):
+        self._transaction(self._register, usernames)
+
+    def lease(self, worker_id, count, lease_seconds):
+        def operation(cursor):
+            now = time.time()
+            cursor.execute(
+                'SELECT username FROM lease_usernames WHERE next_due <= ? AND wanted_until > ? '
+                'AND (owner IS NULL OR lease_expires < ?) ORDER BY next_due LIMIT ?',
+                (now, now, now, count)
+            )
+            leased = [row[0] for row in cursor.fetchall()]
+            cursor.executemany(
+                'UPDATE lease_usernames SET owner = ?, lease_expires = ? WHERE username = ?',
+                [(worker_id, now + lease_seconds, username) for username in leased]
+            )
+            return leased
+        return self._transaction(operation)
+
+    def heartbeat(self, worker_id, usernames, lease_seconds):
+        self._transaction(self._heartbeat, worker_id, usernames, lease_seconds)
+
+    def complete(self, worker_id, username, result):
+        return self._transaction(self._complete, worker_id, username, result)
+
+    def get_results(self, usernames):
+        with self.lock:
+            return self._get_results(self.connection.cursor(), usernames)
+
+class PostgresLeaseBackend(SQLLeaseBackend):
+    """Leases in Postgres - SKIP LOCKED lets many workers lease concurrently"""
+    placeholder = '%s'
+
+    def __init__(self, url, check_interval=120, interest_ttl=600):
+        if psycopg is None:
+            raise RuntimeError("The Postgres backend requires the 'psycopg' package (install the 'postgres' extra)")
+        super().__init__(check_interval, interest_ttl)
+        self.lock = threading.Lock()
+        self.connection = psycopg.connect(url)
+        with self.connection.transaction():
+            self._create_schema(self.connection.cursor())
+
+    def _transaction(self, operation, *args):
+        with self.lock, self.connection.transaction():
+            return operation(self.connection.cursor(), *args)
+
+    def register(self, usernames):
+        self._transaction(self._register, usernames)
+
+    def lease(self, worker_id, count, lease_seconds):
+        def operation(cursor):
+            now = time.time()
+            cursor.execute(
+                'UPDATE lease_usernames SET owner = %s, lease_expires = %s WHERE username IN ('
+                'SELECT username FROM lease_usernames WHERE next_due <= %s AND wanted_until > %s '
+                'AND (owner IS NULL OR lease_expires < %s) ORDER BY next_due LIMIT %s FOR UPDATE SKIP LOCKED'
+                ') RETURNING username',
+                (worker_id, now + lease_seconds, now, now, now, count)
+            )
+            return [row[0] for row in cursor.fetchall()]
+        return self._transaction(operation)
+
+    def heartbeat(self, worker_id, usernames, lease_seconds):
+        self._transaction(self._heartbeat, worker_id, usernames, lease_seconds)
+
+    def complete(self, worker_id, username, result):
+        return self._transaction(self._complete, worker_id, username, result)
+
+    def get_results(self, usernames):
+        return self._transaction(self._get_results, usernames)
+
+class RedisLeaseBackend(LeaseBackend):
+    """Leases in Redis sorted sets, updated atomically by Lua scripts"""
+
+    REGISTER_SCRIPT = """
+    for i, username in ipairs(ARGV) do
+        if i > 2 then
+            redis.call('ZADD', KEYS[3], ARGV[2], username)
+            if not redis.call('ZSCORE', KEYS[2], username) then
+                redis.call('ZADD', KEYS[1], 'NX', ARGV[1], username)
+            end
+        end
+    end
+    """
+
+    LEASE_SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', '(' .. now)
+    for _, username in ipairs(expired) do
+        redis.call('ZREM', KEYS[2], username)
+        redis.call('HDEL', KEYS[4], username)
+        redis.call('ZADD', KEYS[1], now, username)
+    end
+    local leased = {}
+    local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now, 'LIMIT', 0, tonumber(ARGV[3]) * 2)
+    for _, username in ipairs(due) do
+        if #leased >= tonumber(ARGV[3]) then break end
+        redis.call('ZREM', KEYS[1], username)
+        local wanted = redis.call('ZSCORE', KEYS[3], username)
+        if wanted and tonumber(wanted) > now then
+            redis.call('ZADD', KEYS[2], now + tonumber(ARGV[4]), username)
+            redis.call('HSET', KEYS[4], username, ARGV[2])
+            table.insert(leased, username)
+        else
+            redis.call('ZREM', KEYS[3], username)
+        end
+    end
+    return leased
+    """
+
+    COMPLETE_SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local lease_expires = redis.call('ZSCORE', KEYS[2], ARGV[2])
+    if redis.call('HGET', KEYS[4], ARGV[2]) ~= ARGV[3] or not lease_expires or tonumber(lease_expires) < now then
+        return 0
+    end
+    redis.call('ZREM', KEYS[2], ARGV[2])
+    redis.call('HDEL', KEYS[4], ARGV[2])
+    redis.call('ZADD', KEYS[1], now + tonumber(ARGV[4]), ARGV[2])
+    redis.call('HSET', KEYS[5], ARGV[2], ARGV[5])
+    return 1
+    """
+
+    def __init__(self, url, check_interval=120, interest_ttl=600, prefix='igmonitor'):
+        if redis is None:
+            raise RuntimeError("The Redis backend requires the 'redis' package (install the 'redis' extra)")
+        super().__init__(check_interval, interest_ttl)
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.keys = [f"{prefix}:{name}" for name in ('due', 'leases', 'wanted', 'owners', 'results')]
+        self.register_script = self.client.register_script(self.REGISTER_SCRIPT)
+        self.lease_script = self.client.register_script(self.LEASE_SCRIPT)
+        self.complete_script = self.client.register_script(self.COMPLETE_SCRIPT)
+
+    def register(self, usernames):
+        now = time.time()
+        usernames = list(usernames)
+        for i in range(0, len(usernames), 1000):
+            self.register_script(keys=self.keys[:3], args=[now, now + self.interest_ttl] + usernames[i:i + 1000])
+
+    def lease(self, worker_id, count, lease_seconds):
+        return self.lease_script(keys=self.keys[:4], args=[time.time(), worker_id, count, lease_seconds])
+
+    def heartbeat(self, worker_id, usernames, lease_seconds):
+        expires = time.time() + lease_seconds
+        for username in usernames:
+            if self.client.hget(self.keys[3], username) == worker_id:
+                self.client.zadd(self.keys[1], {username: expires}, xx=True)
+
+    def complete(self, worker_id, username, result):
+        now = time.time()
+        stored = json.dumps({'checked_at': now, 'result': result})
+        return bool(self.complete_script(keys=self.keys, args=[now, username, worker_id, self.check_interval, stored]))
+
+    def get_results(self, usernames):
+        usernames = list(usernames)
+        if not usernames:
+            return {}
+        values = self.client.hmget(self.keys[4], usernames)
+        results = {}
+        for username, value in zip(usernames, values):
+            if value:
+                stored = json.loads(value)
+                results[username] = (stored['checked_at'], stored['result'])
+        return results
+
+def open_lease_backend(url, check_interval=120, interest_ttl=600):
+    """Open a backend from a URL: memory://, sqlite:///path, redis://... or postgresql://..."""
+    if url.startswith('memory://'):
+        return MemoryLeaseBackend(check_interval, interest_ttl)
+    if url.startswith('sqlite:///'):
+        return SQLiteLeaseBackend(url[len('sqlite:///'):], check_interval, interest_ttl)
+    if url.startswith(('redis://', 'rediss://')):
+        return RedisLeaseBackend(url, check_interval, interest_ttl)
+    if url.startswith(('postgres://', 'postgresql://')):
+        return PostgresLeaseBackend(url, check_interval, interest_ttl)
+    raise ValueError(f"Unsupported coordinator backend: {url}")
+
+class LeaseWorker:
+    """Leases usernames from a backend, checks them and writes the results back"""
+
+    def __init__(self, backend, check_function, worker_id=None, batch_size=5, lease_seconds=60, poll_interval=2):
+        self.backend = backend
+        self.check_function = check_function
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}"
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.held = set()  # Usernames currently leased by this worker
+        self.held_lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.stats = {'checked': 0, 'lost_leases': 0}
+
+    def _heartbeat_loop(self):
+        """Renew our leases well before they expire"""
+        while not self.stopped.wait(self.lease_seconds / 3):
+            with self.held_lock:
+                held = list(self.held)
+            if held:
+                try:
+                    self.backend.heartbeat(self.worker_id, held, self.lease_seconds)
+                except Exception as e:
+                    print(f"{Fore.YELLOW}⚠️ {self.worker_id} heartbeat failed: {e}")
+
+    def run_once(self):
+        """Lease and check one batch, returning how many usernames were checked"""
+        leased = self.backend.lease(self.worker_id, self.batch_size, self.lease_seconds)
+        with self.held_lock:
+            self.held.update(leased)
+
+        for username in leased:
+            try:
+                result = self.check_function(username)
+            except Exception as e:
+                result = {'status': 'error', 'followers': 0, 'following': 0, 'posts': 0, 'verified': False, 'reason': f'Worker error: {str(e)[:50]}...'}
+            try:
+                if self.backend.complete(self.worker_id, username, result):
+                    self.stats['checked'] += 1
+                else:
+                    self.stats['lost_leases'] += 1
+                    print(f"{Fore.YELLOW}⚠️ {self.worker_id} lost its lease on @{username} - result discarded")
+            finally:
+                with self.held_lock:
+                    self.held.discard(username)
+        return len(leased)
+
+    def run(self):
+        """Work until stop() is called"""
+        heartbeat = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        heartbeat.start()
+        print(f"{Fore.GREEN}Lease worker {self.worker_id} started")
+        while not self.stopped.is_set():
+            try:
+                if not self.run_once():
+                    self.stopped.wait(self.poll_interval)
+            except Exception as e:
+                print(f"{Fore.RED}{self.worker_id} error: {e}")
+                self.stopped.wait(self.poll_interval * 5)
+
+    def stop(self):
+        """Ask the worker to finish its current batch and exit"""
+        self.stopped.set()
+
+def start_local_workers(backend, check_function, count, batch_size=5, lease_seconds=60):
+    """Run count lease workers as daemon threads of this process - how the memory backend gets its results"""
+    workers = [
+        LeaseWorker(backend, check_function, f"{socket.gethostname()}-{os.getpid()}-local-{index}", batch_size, lease_seconds)
+        for index in range(count)
+    ]
+    for worker in workers:
+        threading.Thread(target=worker.run, daemon=True).start()
+    return workers
+
+def run_lease_worker(url, check_interval, batch_size, lease_seconds):
+    """Entry point for one worker process"""
+    # Imported here so each worker process builds its own monitor and HTTP session
+    from discord_instagram_bot import DiscordInstagramMonitor
+
+    monitor = DiscordInstagramMonitor()
+    backend = open_lease_backend(url, check_interval)
+    LeaseWorker(backend, monitor.check_username_status, batch_size=batch_size, lease_seconds=lease_seconds).run()
+
+def main():
+    """Start lease workers on this host"""
+    parser = argparse.ArgumentParser(description='Distributed Instagram check workers')
+    parser.add_argument('--backend', default=os.getenv('CHECK_COORDINATOR', 'sqlite:///check_leases.db'), help='memory://, sqlite:///path, redis://... or postgresql://...')
+    parser.add_argument('--workers', type=int, default=2, help='Worker processes to start on this host')
+    parser.add_argument('--interval', type=int, default=120, help='Seconds between checks of the same username')
+    parser.add_argument('--batch-size', type=int, default=5, help='Usernames leased per batch')
+    parser.add_argument('--lease', type=int, default=60, help='Lease length in seconds')
+    parser.add_argument('--add', nargs='*', default=[], help='Usernames to register before starting')
+    args = parser.parse_args()
+
+    if args.backend.startswith('memory://'):
+        print(f"{Fore.YELLOW}The memory backend is a local stand-in - workers run as threads in this process")
+
+    backend = open_lease_backend(args.backend, args.interval)
+    if args.add:
+        backend.register([username.lstrip('@') for username in args.add])
+
+    print(f"{Fore.CYAN}🚀 Starting {args.workers} lease workers on {args.backend}")
+    if args.backend.startswith('memory://'):
+        from discord_instagram_bot import DiscordInstagramMonitor
+        start_local_workers(backend, DiscordInstagramMonitor().check_username_status, args.workers, args.batch_size, args.lease)
+    else:
+        import multiprocessing
+        for _ in range(args.workers):
+            multiprocessing.Process(target=run_lease_worker, args=(args.backend, args.interval, args.batch_size, args.lease), daemon=True).start()
+
+    try:
+        while True:
+            time.sleep(60)
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] Lease workers running")
+    except KeyboardInterrupt:
+        print(f"\n{Fore.YELLOW}👋 Workers stopped by user.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Instagram Check Worker
+Checker processes that take jobs from the Discord bot over a local SQLite queue
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from colorama import Fore, init
+
+# Initialize colorama
+init(autoreset=True)
+
+class CheckJobQueue:
+    """Check jobs and their results, stored in a SQLite file shared by the bot and its workers
+
+    A job's method is 'status' for the regular check, 'fresh' for one that must not be answered
+    from the shared result cache, or 'fallback' for the fallback method order, used to confirm a
+    change with a different method than the one that saw it.
+
+    Several bot processes (e.g. shards) may share one queue file: each job remembers every
+    requester that published it, and each requester only collects its own copy of the result.
+    """
+
+    def __init__(self, path, requester=None):
+        self.path = path
+        self.requester = requester or f"{socket.gethostname()}-{os.getpid()}"
+        self.lock = threading.Lock()  # One connection, shared by the bot's worker threads
+        self.connection = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT NOT NULL, priority INTEGER NOT NULL DEFAULT 1, '
+            'enqueued_at REAL NOT NULL, claimed_by TEXT, claimed_at REAL, method TEXT NOT NULL DEFAULT \'status\')'
+        )
+        # Queue files from before jobs carried a method
+        columns = [row[1] for row in self.connection.execute('PRAGMA table_info(jobs)')]
+        if 'method' not in columns:
+            self.connection.execute("ALTER TABLE jobs ADD COLUMN method TEXT NOT NULL DEFAULT 'status'")
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS job_requesters ('
+            'job_id INTEGER NOT NULL, requester TEXT NOT NULL, PRIMARY KEY (job_id, requester))'
+        )
+        # Results from before they were kept per requester only ever held a few seconds of checks
+        columns = [row[1] for row in self.connection.execute('PRAGMA table_info(results)')]
+        if columns and 'requester' not in columns:
+            self.connection.execute('DROP TABLE results')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            'job_id INTEGER NOT NULL, requester TEXT NOT NULL, username TEXT NOT NULL, result TEXT NOT NULL, '
+            'checked_at REAL NOT NULL, worker TEXT, PRIMARY KEY (requester, job_id))'
+        )
+        self.connection.execute('CREATE INDEX IF NOT EXISTS jobs_by_priority ON jobs (priority, id)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS jobs_by_username ON jobs (username, method)')
+
+    def publish(self, username, priority=1, method='status'):
+        """Queue a check, reusing a job that is already waiting for the same username and method (lower priority runs first)"""
+        with self.lock:
+            self.connection.execute('BEGIN IMMEDIATE')
+            try:
+                row = self.connection.execute(
+                    'SELECT id FROM jobs WHERE username = ? AND method = ?', (username, method)
+                ).fetchone()
+                if row:
+                    job_id = row[0]
+                    # A command waiting on a queued background job moves it up
+                    self.connection.execute('UPDATE jobs SET priority = MIN(priority, ?) WHERE id = ?', (priority, job_id))
+                else:
+                    job_id = self.connection.execute(
+                        'INSERT INTO jobs (username, priority, enqueued_at, method) VALUES (?, ?, ?, ?)',
+                        (username, priority, time.time(), method)
+                    ).lastrowid
+                self.connection.execute(
+                    'INSERT OR IGNORE INTO job_requesters (job_id, requester) VALUES (?, ?)', (job_id, self.requester)
+                )
+                self.connection.execute('COMMIT')
+                return job_id
+            except Exception:
+                self.connection.execute('ROLLBACK')
+                raise
+
+    def claim(self, worker_id, stale_after=300):
+        """Claim the next job as (job_id, username, method), taking over jobs from workers that stopped responding"""
+        with self.lock:
+            now = time.time()
+            self.connection.execute('BEGIN IMMEDIATE')
+            try:
+                row = self.connection.execute(
+                    'SELECT id, username, method FROM jobs WHERE claimed_by IS NULL OR claimed_at < ? '
+                    'ORDER BY priority, id LIMIT 1',
+                    (now - stale_after,)
+                ).fetchone()
+                if row:
+                    self.connection.execute(
+                        'UPDATE jobs SET claimed_by = ?, claimed_at = ? WHERE id = ?',
+                        (worker_id, now, row[0])
+                    )
+                self.connection.execute('COMMIT')
+                return row
+            except Exception:
+                self.connection.execute('ROLLBACK')
+                raise
+
+    def complete(self, job_id, username, result, worker_id, checked_at=None):
+        """Publish a job's result to each of its requesters and remove the job (checked_at: when a reused result was checked)"""
+        with self.lock:
+            self.connection.execute('BEGIN IMMEDIATE')
+            try:
+                self.connection.execute(
+                    'INSERT OR REPLACE INTO results (job_id, requester, username, result, checked_at, worker) '
+                    'SELECT job_id, requester, ?, ?, ?, ? FROM job_requesters WHERE job_id = ?',
+                    (username, json.dumps(result), checked_at or time.time(), worker_id, job_id)
+                )
+                self.connection.execute('DELETE FROM job_requesters WHERE job_id = ?', (job_id,))
+                self.connection.execute('DELETE FROM jobs WHERE id = ?', (job_id,))
+                self.connection.execute('COMMIT')
+            except Exception:
+                self.connection.execute('ROLLBACK')
+                raise
+
+    def collect_results(self, limit=500, abandoned_after=3600):
+        """Take this requester's finished results off the queue as (job_id, username, result, checked_at)
+
+        Results nobody collected for abandoned_after seconds (their requester is gone) are dropped.
+        """
+        with self.lock:
+            self.connection.execute('BEGIN IMMEDIATE')
+            try:
+                rows = self.connection.execute(
+                    'SELECT job_id, username, result, checked_at FROM results WHERE requester = ? ORDER BY job_id LIMIT ?',
+                    (self.requester, limit)
+                ).fetchall()
+                if rows:
+                    self.connection.executemany(
+                        'DELETE FROM results WHERE requester = ? AND job_id = ?', [(self.requester, row[0]) for row in rows]
+                    )
+                self.connection.execute('DELETE FROM results WHERE checked_at < ?', (time.time() - abandoned_after,))
+                self.connection.execute('COMMIT')
+            except Exception:
+                self.connection.execute('ROLLBACK')
+                raise
+            return [(job_id, username, json.loads(result), checked_at) for job_id, username, result, checked_at in rows]
+
+    def pending_count(self):
+        """Number of jobs waiting or being checked"""
+        with self.lock:
+            return self.connection.execute('SELECT COUNT(*) FROM jobs').fetchone()[0]
+
+def run_worker(queue_path, worker_id, poll_interval=0.5):
+    """Check jobs from the queue until interrupted"""
+    # Imported here so each worker process builds its own monitor, HTTP session and shared cache handle
+    from discord_instagram_bot import monitor, check_with_shared_cache
+
+    queue = CheckJobQueue(queue_path)
+    print(f"{Fore.GREEN}Worker {worker_id} started (pid {os.getpid()})")
+
+    while True:
+        try:
+            job = queue.claim(worker_id)
+            if not job:
+                time.sleep(poll_interval)
+                continue
+
+            job_id, username, method = job
+            checked_at = None
+            try:
+                if method == 'fallback' and not monitor.simulation_mode:
+                    # Confirmations must be fresh - never answered from the shared cache
+                    result = monitor.check_fallback_methods(username)
+                else:
+                    # Reuses (unless fresh) and fills SHARED_RESULT_CACHE like the bot's own checks
+                    checked, result = check_with_shared_cache(username, method != 'fresh')
+                    checked_at = checked.timestamp()
+            except Exception as e:
+                result = {'status': 'error', 'followers': 0, 'following': 0, 'posts': 0, 'verified': False, 'reason': f'Worker error: {str(e)[:50]}...'}
+            queue.complete(job_id, username, result, worker_id, checked_at)
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] {worker_id} @{username}: {result.get('status')}")
+
+        except KeyboardInterrupt:
+            break
+        except sqlite3.Error as e:
+            print(f"{Fore.RED}Worker {worker_id} queue error: {e}")
+            time.sleep(poll_interval * 4)
+
+def main():
+    """Start one or more checker worker processes"""
+    parser = argparse.ArgumentParser(description='Instagram check workers for the Discord bot')
+    parser.add_argument('--queue', default=os.getenv('CHECK_WORKER_QUEUE', 'check_jobs.db'), help='SQLite queue file shared with the bot')
+    parser.add_argument('--workers', type=int, default=2, help='Number of worker processes to start')
+    args = parser.parse_args()
+
+    # Create the schema once before the workers race for it
+    CheckJobQueue(args.queue)
+
+    print(f"{Fore.CYAN}🚀 Starting {args.workers} check workers on {args.queue}")
+    processes = []
+    for index in range(args.workers):
+        process = multiprocessing.Process(
+            target=run_worker,
+            args=(args.queue, f"worker-{os.getpid()}-{index}"),
+            daemon=True
+        )
+        process.start()
+        processes.append(process)
+
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        print(f"\n{Fore.YELLOW}👋 Workers stopped by user.")
+
+if __name__ == "__main__":
+    main()
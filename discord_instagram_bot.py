@@ -9,6 +9,7 @@ from discord.ext import commands, tasks
 import asyncio
 import json
 import os
+import hashlib
 import time
 import random
 from datetime import datetime, timedelta
@@ -16,9 +17,24 @@ from colorama import Fore, Style, init
 import requests
 from bs4 import BeautifulSoup
 import re
+import itertools
+import heapq
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+import aiohttp
 import instaloader
 from instaloader import Profile, ProfileNotExistsException, PrivateProfileNotFollowedException, LoginException
 from cfonts import render
+from result_cache import open_result_cache, TimedLRUCache
+from check_worker import CheckJobQueue
+from check_coordinator import open_lease_backend, start_local_workers
+from http_transport import open_http_session, warm_up, ACCEPT_ENCODING
+
+try:
+    import fcntl  # Locks the shared data file when several shard processes save it
+except ImportError:
+    fcntl = None
 
 # Initialize colorama
 init(autoreset=True)
@@ -50,33 +66,260 @@ def display_logo():
         print(f"{Fore.RED}{'='*60}{Style.RESET_ALL}\n")
 
 # Global monitoring cache and optimization config
-monitoring_cache = {}
+live_checks = {}  # {username: {'task', 'lane', 'fresh', 'method'}} - live checks in flight, shared by concurrent callers
+restored_check_results = set()  # Usernames whose latest result came from the on-disk cache
+background_refreshes = set()  # Refresh tasks of !check replies - the event loop only keeps weak references to tasks
+pipeline_stats = {}  # {stage: {'processed', 'seconds', 'max_depth', 'workers'}} - from the latest cycle
+check_latencies = deque(maxlen=1000)  # Seconds per account check, most recent last
+transition_stats = {'confirmed': 0, 'rejected': 0, 'pending': 0}  # Outcomes of suspected status changes
+schedule_stats = {'cycles': 0, 'overruns': 0, 'deferred': 0, 'shed': 0, 'max_lag': 0.0, 'last_cycle_seconds': 0.0}
+guild_schedule_stats = {}  # {guild_id: {'checked', 'backlog', 'lag'}} - from the latest cycle
 monitoring_config = {
     'max_concurrent_checks': 3,
     'check_interval': 120,  # 2 minutes instead of 1
-    'cache_duration': 180,  # 3 minutes cache
-    'batch_size': 8
+    'cache_duration': 180,  # 3 minutes cache - for statuses without their own TTL below
+    'status_cache_ttl': {  # How long a result stays fresh, per status
+        'active_public': 300,  # Stable accounts rarely change between checks
+        'active_private': 300,
+        'banned': 180,
+        'not_found': 900,  # Negative cache - mistyped names don't cost a request on every !check
+        'rate_limited': 30,
+        'error': 15
+    },
+    'cache_max_entries': 50000,  # Least recently used results are dropped beyond this
+    'notification_mode': 'auto',  # 'account', 'digest' or 'auto'
+    'digest_threshold': 3,  # auto mode: more transitions than this per channel are batched
+    'summary_threshold': 25,  # above this, send one compact summary embed instead
+    'embeds_per_message': 10,  # Discord allows at most 10 embeds per message
+    'channel_send_limit': 5,  # Discord's per-channel message bucket: 5 sends...
+    'channel_send_period': 5.0,  # ...per 5 seconds
+    'notification_max_attempts': 3,
+    'notification_worker_idle': 60,  # Seconds before an idle channel worker exits
+    'undelivered_file': 'undelivered_notifications.json',
+    'pending_transitions_file': 'pending_transitions.json',  # Transitions found mid-cycle, announced at the end of it
+    'asset_channel_id': int(os.getenv('ASSET_STORAGE_CHANNEL_ID', '0')) or None,  # Optional channel for one-time asset uploads
+    'asset_verify_interval': 1800,  # Seconds between checks that a cached asset URL still resolves
+    'check_fresh_window': 120,  # !check answers from stored results younger than this without refreshing
+    'check_max_stale': 3600,  # Older stored results are not shown - !check runs a live check instead
+    'bulk_import_limit': 1000,  # Max usernames accepted by one !bulkwatch
+    'bulk_progress_interval': 5,  # Seconds between progress message edits
+    'worker_queue_path': os.getenv('CHECK_WORKER_QUEUE'),  # Hand checks to check_worker.py processes when set
+    'worker_result_timeout': 180,  # Seconds to wait for a worker before treating the check as failed
+    'worker_max_outstanding': 50,  # Jobs the bot keeps queued for workers at once - set to at least the worker count
+    'coordinator_url': os.getenv('CHECK_COORDINATOR'),  # Leave background checks to check_coordinator.py workers when set
+    'result_cache_file': 'check_result_cache.json',  # Recent results kept across restarts
+    'pacing_window': 0.8,  # Spread a cycle's checks over this fraction of check_interval
+    'pacing_jitter': 0.5,  # Random shortening of each gap between checks, as a fraction of the gap
+    'pacing_max_lag': 30,  # Seconds behind schedule before accounts with a fresh result are served from cache
+    'checkpoint_interval': 15,  # Seconds between saves of the watch state during a cycle
+    'guild_weights': {},  # {guild_id: weight} - share of each cycle's checks, default 1
+    'guild_check_quota': None,  # Max checks per guild per cycle; the rest wait for the next cycle
+    'interactive_reserved_checks': 1,  # Check slots only commands may use, so they never queue behind the sweep
+    'interactive_latency_target': 1.0,  # Seconds a command may wait for a check slot - past that, background checks get one slot less
+    'pipeline_queue_size': 100,  # Results waiting between monitoring pipeline stages before fetching pauses
+    'confirmation_workers': 2,  # Classify stage workers - each may run one confirmation re-check
+    'check_executor_queue': 8,  # Check jobs allowed to wait for a check thread before submitters block
+    'check_deadline': 25,  # Seconds one check may spend across all its fallback methods, delays included
+    'http_transport': os.getenv('INSTAGRAM_TRANSPORT', 'http1')  # 'http2' multiplexes checks over a few connections (needs httpx[http2])
 }
 
-# Notification channel configuration
-ban_notification_channel_id = None
-unban_notification_channel_id = None
+# Latest check results - kept for check_max_stale, so !check can still answer from older results
+monitoring_cache = TimedLRUCache(monitoring_config['cache_max_entries'], monitoring_config['check_max_stale'])
 
-def clean_monitoring_cache(current_time):
-    """Clean old entries from monitoring cache"""
-    try:
-        expired_keys = []
-        for key, (cache_time, _) in monitoring_cache.items():
-            if (current_time - cache_time).seconds > monitoring_config['cache_duration']:
-                expired_keys.append(key)
-        
-        for key in expired_keys:
-            del monitoring_cache[key]
+# Sharded deployment - several processes each own a subset of guilds
+shard_config = {
+    'shard_count': int(os.getenv('BOT_SHARD_COUNT', '0')) or None,
+    'shard_ids': [int(shard_id) for shard_id in os.getenv('BOT_SHARD_IDS', '').split(',') if shard_id.strip()] or None,
+    'sharded': os.getenv('BOT_SHARDED', '').lower() in ('1', 'true', 'yes') or bool(os.getenv('BOT_SHARD_COUNT')),
+    'shared_cache_path': os.getenv('SHARED_RESULT_CACHE'),  # Optional cache shared by all processes on the host: SQLite path or shm://name
+    'shared_cache_ttl': 90  # Reuse another process's result when it is younger than this
+}
+
+def is_partitioned():
+    """Whether this process owns only some of the bot's guilds"""
+    return shard_config['shard_ids'] is not None
+
+def owns_guild(guild_id):
+    """Whether this process's shards own a guild (Discord: shard = (guild_id >> 22) % shard_count)"""
+    if not is_partitioned():
+        return True
+    return (guild_id >> 22) % shard_config['shard_count'] in shard_config['shard_ids']
+
+if is_partitioned():
+    # Per-process files that would otherwise be overwritten by the other shards
+    shard_suffix = '-'.join(str(shard_id) for shard_id in shard_config['shard_ids'])
+    monitoring_config['undelivered_file'] = f"undelivered_notifications.shard-{shard_suffix}.json"
+    monitoring_config['pending_transitions_file'] = f"pending_transitions.shard-{shard_suffix}.json"
+    monitoring_config['result_cache_file'] = f"check_result_cache.shard-{shard_suffix}.json"
+
+shared_result_cache = open_result_cache(shard_config['shared_cache_path']) if shard_config['shared_cache_path'] else None
+
+# Check jobs go to separate worker processes when a queue is configured
+check_job_queue = CheckJobQueue(monitoring_config['worker_queue_path']) if monitoring_config['worker_queue_path'] else None
+
+def check_concurrency():
+    """Checks the bot keeps going at once - worker processes scale separately from this process's check threads"""
+    if check_job_queue:
+        return monitoring_config['worker_max_outstanding']
+    return monitoring_config['max_concurrent_checks']
+worker_jobs = {}  # {job_id: asyncio.Future} - results the bot is waiting for
+
+# Background checks are leased to workers on other hosts when a coordinator backend is configured
+check_coordinator = open_lease_backend(monitoring_config['coordinator_url'], monitoring_config['check_interval']) if monitoring_config['coordinator_url'] else None
+local_lease_workers = []  # The memory:// stand-in lives in this process, so its workers do too
+
+class CheckLimiter:
+    """Limit on live checks running at once, shared by priority lanes
+
+    Waiting checks start in lane order, and part of the limit is reserved for interactive
+    commands so a large background sweep can't hold every slot.
+    """
+    LANES = ('interactive', 'confirmation', 'background')
+    
+    def __init__(self, limit, reserved):
+        self.limit = limit
+        self.reserved = min(reserved, limit - 1)
+        self.active = {lane: 0 for lane in self.LANES}
+        self.waiters = {lane: deque() for lane in self.LANES}  # [key, future] per waiting check
+        self.latencies = {lane: deque(maxlen=100) for lane in self.LANES}  # Seconds spent waiting for a slot
+        self.slow_until = 0.0  # Background gives up a slot until then after an interactive check waited too long
+    
+    def _can_start(self, lane):
+        running = sum(self.active.values())
+        if lane == 'interactive':
+            return running < self.limit
+        shared = self.limit - self.reserved
+        if lane == 'background' and time.monotonic() < self.slow_until:
+            shared = max(1, shared - 1)
+        return running < shared
+    
+    def _wake(self):
+        for lane in self.LANES:
+            while self.waiters[lane] and self._can_start(lane):
+                _, waiter = self.waiters[lane].popleft()
+                if not waiter.done():
+                    self.active[lane] += 1
+                    waiter.set_result(lane)
+    
+    async def acquire(self, lane, key=None):
+        """Wait for a slot and return the lane it was granted in - release that lane
+
+        The lane differs from the one asked for when promote() moved the waiting check up.
+        """
+        started = time.monotonic()
+        # Go straight in only if nobody of equal or higher priority is already waiting
+        ahead = any(self.waiters[other] for other in self.LANES[:self.LANES.index(lane) + 1])
+        if not ahead and self._can_start(lane):
+            self.active[lane] += 1
+            self.record_latency(lane, time.monotonic() - started)
+            return lane
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters[lane].append([key, waiter])
+        try:
+            granted = await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(waiter.result())
+            raise
+        self.record_latency(granted, time.monotonic() - started)
+        return granted
+    
+    def promote(self, key, lane):
+        """Move a check still waiting in a lower lane up to lane, e.g. when a command joins a background check"""
+        rank = self.LANES.index(lane)
+        for lower in self.LANES[rank + 1:]:
+            for entry in list(self.waiters[lower]):
+                if entry[0] == key:
+                    self.waiters[lower].remove(entry)
+                    self.waiters[lane].append(entry)
+                    self._wake()
+                    return True
+        return False
+    
+    def release(self, lane):
+        self.active[lane] -= 1
+        self._wake()
+    
+    def record_latency(self, lane, seconds):
+        """Track how long a lane's checks wait for a slot, slowing the sweep while commands miss their target"""
+        self.latencies[lane].append(seconds)
+        if lane == 'interactive' and seconds > monitoring_config['interactive_latency_target']:
+            self.slow_until = time.monotonic() + 60
+    
+    def stats(self):
+        """{lane: (running, waiting, median slot wait)}"""
+        stats = {}
+        for lane in self.LANES:
+            latencies = sorted(self.latencies[lane])
+            median = latencies[len(latencies) // 2] if latencies else None
+            stats[lane] = (self.active[lane], len(self.waiters[lane]), median)
+        return stats
+
+class CheckExecutor:
+    """Dedicated thread pool for blocking check work, kept apart from the default executor discord.py uses
+
+    Submissions beyond the pool size wait in a bounded queue; callers block once it is full.
+    """
+    
+    def __init__(self, workers, queue_limit):
+        self.workers = workers
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='instagram-check')
+        self.slots = asyncio.Semaphore(workers + queue_limit)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.completed = 0
+        self.queue_waits = deque(maxlen=200)  # Seconds from submission to a thread picking the job up
+        self.run_times = deque(maxlen=200)  # Seconds a thread spent on the job
+    
+    async def run(self, func, *args):
+        """Run func(*args) on a check thread and return its result"""
+        async with self.slots:
+            submitted = time.monotonic()
             
-        if expired_keys:
-            print(f"🧹 Cleaned {len(expired_keys)} expired cache entries")
-    except Exception as e:
-        print(f"❌ Error cleaning cache: {e}")
+            def job():
+                started = time.monotonic()
+                with self.lock:
+                    self.active += 1
+                    self.queue_waits.append(started - submitted)
+                try:
+                    return func(*args)
+                finally:
+                    with self.lock:
+                        self.active -= 1
+                        self.completed += 1
+                        self.run_times.append(time.monotonic() - started)
+            
+            return await asyncio.get_running_loop().run_in_executor(self.pool, job)
+    
+    def stats(self):
+        """Active threads, completed jobs and median queue wait/run time"""
+        with self.lock:
+            waits = sorted(self.queue_waits)
+            runs = sorted(self.run_times)
+            return {
+                'active': self.active,
+                'workers': self.workers,
+                'completed': self.completed,
+                'queue_wait': waits[len(waits) // 2] if waits else 0.0,
+                'run_time': runs[len(runs) // 2] if runs else 0.0
+            }
+
+# Check threads - one per concurrent check the limiter allows
+check_executor = CheckExecutor(monitoring_config['max_concurrent_checks'], monitoring_config['check_executor_queue'])
+
+# Shared limit on live checks running at once
+check_limiter = CheckLimiter(monitoring_config['max_concurrent_checks'], monitoring_config['interactive_reserved_checks'])
+
+# Command assets - uploaded once, then reused by CDN URL
+command_assets = {
+    'command_gif': 'attached_assets/naruto-shippuden-itachi-uchiha-amaterasu-eyes-paimcqzrmjzhp025_1756983756974.gif'
+}
+asset_url_cache = {}  # {asset_name: {'url': str, 'verified_at': float}}
+asset_upload_locks = {}  # {asset_name: asyncio.Lock}
+
+# Notification channel configuration - per guild, persisted with the watch state
+guild_notification_routing = {}  # {guild_id: {'ban': channel_id, 'unban': channel_id}}
+notification_routes = {}  # {guild_id: {'ban': channel, 'unban': channel}} - resolved channel cache
 
 def extract_username_from_url(input_text):
     """Extract Instagram username from URL or return username directly"""
@@ -114,6 +357,10 @@ def extract_username_from_url(input_text):
     # If not a URL, treat as username
     return input_text.lstrip('@')
 
+def is_valid_username(username):
+    """Check that a string can be an Instagram username"""
+    return bool(username) and re.fullmatch(r'[A-Za-z0-9._]{1,30}', username) is not None
+
 def calculate_duration(added_at, current_time):
     """Calculate monitoring duration efficiently"""
     if not added_at:
@@ -135,6 +382,19 @@ def calculate_duration(added_at, current_time):
     except Exception:
         return "Unknown"
 
+def new_watch_entry(added_by, result):
+    """Create a watch list entry from an initial check result"""
+    now = datetime.now().isoformat()
+    # A failed first check leaves the status unknown - the first good result is adopted without an alert
+    status = result['status'] if result['status'] in ['active_public', 'active_private', 'not_found', 'banned'] else 'unknown'
+    return {
+        'added_by': added_by,
+        'added_at': now,
+        'last_status': status,
+        'last_check': now,
+        'initial_data': result
+    }
+
 def add_account_info_to_embed(embed, data, result):
     """Add account information to embed efficiently"""
     initial_data = data.get('initial_data', {})
@@ -152,7 +412,8 @@ def add_account_info_to_embed(embed, data, result):
 # Enhanced Instagram Monitor class for Discord integration
 class DiscordInstagramMonitor:
     def __init__(self):
-        self.session = requests.Session()
+        # One connection pool per Instagram host, sized for the check threads
+        self.session = open_http_session(monitoring_config['http_transport'], monitoring_config['max_concurrent_checks'])
         self.user_agents = [
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
@@ -166,16 +427,59 @@ class DiscordInstagramMonitor:
         
         # Initialize basic monitoring variables
         self.last_check_time = datetime.now()
+        self.deadlines = threading.local()  # Per check thread: monotonic time the current check must finish by
+    
+    def start_deadline(self, budget=None):
+        """Give the check running on this thread a total time budget; returns False if one is already running"""
+        if getattr(self.deadlines, 'at', None) is not None:
+            return False
+        self.deadlines.at = time.monotonic() + (budget or monitoring_config['check_deadline'])
+        self.deadlines.started = time.monotonic()
+        return True
+    
+    def clear_deadline(self):
+        self.deadlines.at = None
+    
+    def time_left(self, limit=None):
+        """Seconds left in this check's budget, capped at limit (limit itself when there is no deadline)"""
+        deadline = getattr(self.deadlines, 'at', None)
+        if deadline is None:
+            return limit
+        left = max(0.0, deadline - time.monotonic())
+        return left if limit is None else min(limit, left)
+    
+    def request_timeout(self, limit):
+        """Timeout for the next request - whatever is left of the budget, up to the method's own limit"""
+        return max(0.5, self.time_left(limit))
+    
+    def out_of_time(self, needed=1.0):
+        """Whether too little of the budget is left to start another method"""
+        left = self.time_left()
+        return left is not None and left < needed
+    
+    def deadline_result(self, errors):
+        """Error result for a check that used up its budget before any method succeeded"""
+        spent = time.monotonic() - getattr(self.deadlines, 'started', time.monotonic())
+        tried = f": {' | '.join(errors)}" if errors else ""
+        return {
+            'status': 'error',
+            'followers': 0,
+            'following': 0,
+            'posts': 0,
+            'verified': False,
+            'deadline_exceeded': True,
+            'reason': f'Deadline exceeded after {spent:.1f}s{tried}'
+        }
         
     def update_headers(self):
         """Update session headers with random user agent"""
         ua = random.choice(self.user_agents)
-        self.session.headers.clear()
+        # Replaces only the rotated headers - clearing would also drop the transport's own defaults
         self.session.headers.update({
             'User-Agent': ua,
             'Accept': '*/*',
             'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
+            'Accept-Encoding': ACCEPT_ENCODING,
             'Connection': 'keep-alive',
             'DNT': '1'
         })
@@ -249,15 +553,20 @@ class DiscordInstagramMonitor:
         else:
             return f"{num:,}"
     
-    def check_username_status(self, username):
-        """Check Instagram username status using reliable web methods"""
+    def check_username_status(self, username, budget=None):
+        """Check Instagram username status using reliable web methods, within a total time budget"""
         self.request_count += 1
         
         if self.simulation_mode:
             return self.simulate_username_check(username)
         
         # Use stable web scraping methods first
-        return self.check_with_stable_methods(username)
+        owns_deadline = self.start_deadline(budget)
+        try:
+            return self.check_with_stable_methods(username)
+        finally:
+            if owns_deadline:
+                self.clear_deadline()
     
     def check_with_stable_methods(self, username):
         """Check Instagram username using stable web scraping methods only"""
@@ -265,31 +574,37 @@ class DiscordInstagramMonitor:
         
         try:
             # Add small delay to be respectful
-            time.sleep(random.uniform(1, 2))
+            time.sleep(self.time_left(random.uniform(1, 2)))
             
             # Try web scraping first (most stable)
-            web_result = self.try_web_scraping(username)
+            web_result = self.session.bandwidth.measure('web_scraping', self.try_web_scraping, username)
             if web_result and isinstance(web_result, dict):
                 status = web_result.get('status')
                 if status in ['active_public', 'active_private', 'not_found', 'banned']:
-                    return web_result
+                    return {**web_result, 'method': 'web_scraping'}
                 elif status == 'rate_limited':
                     self.rate_limited_count += 1
                     errors.append(f"Web scraping: {web_result.get('reason', 'rate limited')}")
                 else:
                     errors.append(f"Web scraping: {web_result.get('reason', 'unknown error')}")
             
-            # Try mobile API as backup
-            mobile_result = self.try_mobile_api(username)
+            # Try mobile API as backup, with whatever is left of the budget
+            if self.out_of_time():
+                return self.deadline_result(errors)
+            mobile_result = self.session.bandwidth.measure('mobile_api', self.try_mobile_api, username)
             if mobile_result and isinstance(mobile_result, dict):
                 status = mobile_result.get('status')
                 if status in ['active_public', 'active_private', 'not_found', 'banned']:
-                    return mobile_result
+                    return {**mobile_result, 'method': 'mobile_api'}
                 elif status == 'rate_limited':
                     self.rate_limited_count += 1
                     errors.append(f"Mobile API: {mobile_result.get('reason', 'rate limited')}")
                 else:
                     errors.append(f"Mobile API: {mobile_result.get('reason', 'unknown error')}")
+            
+            # A method cut short by the budget failed for lack of time - say so
+            if self.out_of_time():
+                return self.deadline_result(errors)
                 
             # If both fail, return error with proper structure and detailed reasons
             return {
@@ -311,34 +626,57 @@ class DiscordInstagramMonitor:
                 'reason': f'Network error: {str(e)[:50]}...'
             }
     
-    def check_fallback_methods(self, username):
-        """Fallback methods using web scraping to get followers/following data"""
+    def check_fallback_methods(self, username, budget=None):
+        """Fallback methods using web scraping to get followers/following data, within a total time budget"""
+        owns_deadline = self.start_deadline(budget)
+        try:
+            return self._check_fallback_methods(username)
+        finally:
+            if owns_deadline:
+                self.clear_deadline()
+    
+    def check_with_other_method(self, username, seen_by=None, budget=None):
+        """Re-check a username starting with a different method than seen_by, the one that produced the result
+
+        Web scraping first when the mobile API saw it, the mobile API first otherwise.
+        """
+        if self.simulation_mode or seen_by == 'mobile_api':
+            return self.check_username_status(username, budget)
+        return self.check_fallback_methods(username, budget)
+    
+    def _check_fallback_methods(self, username):
         errors = []
         
         try:
             # Try mobile API first
-            mobile_result = self.try_mobile_api(username)
+            mobile_result = self.session.bandwidth.measure('mobile_api', self.try_mobile_api, username)
             if mobile_result and isinstance(mobile_result, dict):
                 status = mobile_result.get('status')
                 if status in ['active_public', 'active_private', 'not_found', 'banned']:
-                    return mobile_result
+                    return {**mobile_result, 'method': 'mobile_api'}
                 elif status == 'rate_limited':
                     self.rate_limited_count += 1
                     errors.append(f"Mobile API: rate limited")
                 else:
                     errors.append(f"Mobile API: {mobile_result.get('reason', 'error')}")
             
-            # Try web scraping as final fallback
-            web_result = self.try_web_scraping(username)
+            # Try web scraping as final fallback, with whatever is left of the budget
+            if self.out_of_time():
+                return self.deadline_result(errors)
+            web_result = self.session.bandwidth.measure('web_scraping', self.try_web_scraping, username)
             if web_result and isinstance(web_result, dict):
                 status = web_result.get('status')
                 if status in ['active_public', 'active_private', 'not_found', 'banned']:
-                    return web_result
+                    return {**web_result, 'method': 'web_scraping'}
                 elif status == 'rate_limited':
                     self.rate_limited_count += 1
                     errors.append(f"Web scraping: rate limited")
                 else:
                     errors.append(f"Web scraping: {web_result.get('reason', 'error')}")
+            
+            # A method cut short by the budget failed for lack of time - say so
+            if self.out_of_time():
+                return self.deadline_result(errors)
                 
             # If all methods fail, return error with details
             return {
@@ -372,7 +710,7 @@ class DiscordInstagramMonitor:
                 'Accept-Language': 'en-US,en;q=0.9'
             }
             
-            response = self.session.get(mobile_url, headers=headers, timeout=8)
+            response = self.session.get(mobile_url, headers=headers, timeout=self.request_timeout(8))
             
             if response.status_code == 200:
                 try:
@@ -443,7 +781,7 @@ class DiscordInstagramMonitor:
                 'Connection': 'keep-alive',
             }
             
-            response = self.session.get(url, headers=headers, timeout=15, allow_redirects=True)
+            response = self.session.get(url, headers=headers, timeout=self.request_timeout(15), allow_redirects=True)
             
             if response.status_code == 200:
                 page_text = response.text.lower()
@@ -544,19 +882,28 @@ class DiscordInstagramMonitor:
         # Should never reach here
         return {'status': 'error', 'followers': 0, 'following': 0, 'posts': 0, 'verified': False, 'reason': 'Unknown error'}
     
-    def check_real_instagram_status(self, username):
-        """Use the proven methods from instagram_monitor.py"""
+    def check_real_instagram_status(self, username, budget=None):
+        """Use the proven methods from instagram_monitor.py, within a total time budget"""
         # Check if we should use simulation mode due to rate limiting
         if self.rate_limited_count >= 2 or self.simulation_mode:
             print(f"{Fore.YELLOW}📊 Using simulation mode due to rate limiting protection")
             return self.simulate_username_check(username)
         
+        owns_deadline = self.start_deadline(budget)
+        try:
+            # Charged only for the profile page it fetches itself - the alternative API meters its own
+            return self.session.bandwidth.measure('profile_page', self._check_real_instagram_status, username)
+        finally:
+            if owns_deadline:
+                self.clear_deadline()
+    
+    def _check_real_instagram_status(self, username):
         # Rate limiting and header rotation
         if self.request_count % 2 == 0:
             self.update_headers()
         
         # Try alternative method first (from instagram_monitor.py)
-        result = self.check_username_alternative(username)
+        result = self.session.bandwidth.measure('alternative_api', self.check_username_alternative, username)
         
         if result and isinstance(result, dict):
             status = result.get('status')
@@ -584,12 +931,15 @@ class DiscordInstagramMonitor:
         
         # Fallback to web scraping (from instagram_monitor.py)
         try:
-            # Adaptive delay based on failure count
+            # Adaptive delay based on failure count - skipped when the budget can't cover it and a request
             delay = min(15 + (self.consecutive_failures * 5), 30)
-            time.sleep(random.uniform(delay, delay + 10))
+            wait = random.uniform(delay, delay + 10)
+            if self.out_of_time(wait + 5):
+                return self.deadline_result([f"Alternative: {result.get('reason', 'failed')}"] if isinstance(result, dict) else [])
+            time.sleep(wait)
             
             url = f"https://www.instagram.com/{username}/"
-            response = self.session.get(url, timeout=20, allow_redirects=True)
+            response = self.session.get(url, timeout=self.request_timeout(20), allow_redirects=True)
             
             if response.status_code == 200:
                 page_text = response.text.lower()
@@ -665,7 +1015,7 @@ class DiscordInstagramMonitor:
                 'X-IG-App-ID': '936619743392459'
             }
             
-            response = self.session.get(mobile_url, headers=headers, timeout=10)
+            response = self.session.get(mobile_url, headers=headers, timeout=self.request_timeout(10))
             
             if response.status_code == 200:
                 try:
@@ -882,20 +1232,188 @@ class DiscordInstagramMonitor:
         except:
             return 0
 
+# Outbound notification dispatcher, decoupled from the checking loop
+class NotificationDispatcher:
+    """Per-channel priority queues drained by worker tasks that respect Discord's send buckets"""
+    PRIORITY_ALERT = 0  # Ban / unban / recovery alerts
+    PRIORITY_CONFIRMATION = 1  # "is being monitored" confirmations
+    
+    def __init__(self):
+        self.queues = {}  # {channel_id: asyncio.PriorityQueue}
+        self.workers = {}  # {channel_id: asyncio.Task}
+        self.send_history = {}  # {channel_id: deque of recent send times}
+        self.sequence = itertools.count()  # Keeps FIFO order within a priority
+        self.undelivered = []
+        self.stats = {'queued': 0, 'delivered': 0, 'retried': 0, 'dropped': 0, 'undelivered': 0}
+    
+    def enqueue(self, channel, embeds, priority=PRIORITY_ALERT, attempts=0):
+        """Queue embeds for a channel and make sure a worker is draining it"""
+        channel_id = channel.id
+        if channel_id not in self.queues:
+            self.queues[channel_id] = asyncio.PriorityQueue()
+        
+        item = {'channel': channel, 'embeds': list(embeds), 'priority': priority, 'attempts': attempts}
+        self.queues[channel_id].put_nowait((priority, next(self.sequence), item))
+        self.stats['queued'] += 1
+        
+        worker = self.workers.get(channel_id)
+        if worker is None or worker.done():
+            self.workers[channel_id] = asyncio.create_task(self._channel_worker(channel_id))
+        return True
+    
+    def pending_count(self):
+        """Number of messages still waiting to be sent"""
+        return sum(queue.qsize() for queue in self.queues.values())
+    
+    async def _wait_for_bucket(self, channel_id):
+        """Sleep until the channel's send bucket has room"""
+        limit = monitoring_config['channel_send_limit']
+        period = monitoring_config['channel_send_period']
+        history = self.send_history.setdefault(channel_id, deque())
+        
+        while True:
+            now = time.monotonic()
+            while history and now - history[0] >= period:
+                history.popleft()
+            if len(history) < limit:
+                history.append(now)
+                return
+            await asyncio.sleep(period - (now - history[0]))
+    
+    async def _channel_worker(self, channel_id):
+        """Drain one channel's queue, exiting once it has been idle for a while"""
+        queue = self.queues[channel_id]
+        while True:
+            try:
+                _, _, item = await asyncio.wait_for(queue.get(), timeout=monitoring_config['notification_worker_idle'])
+            except asyncio.TimeoutError:
+                if queue.empty():
+                    self.workers.pop(channel_id, None)
+                    self.queues.pop(channel_id, None)
+                    self.send_history.pop(channel_id, None)
+                    return
+                continue
+            
+            try:
+                await self._deliver(channel_id, item)
+            except Exception as e:
+                print(f"❌ Notification worker error for channel {channel_id}: {e}")
+            finally:
+                queue.task_done()
+    
+    async def _deliver(self, channel_id, item):
+        """Send one message with bounded retries, persisting it if every attempt fails"""
+        max_attempts = monitoring_config['notification_max_attempts']
+        while item['attempts'] < max_attempts:
+            item['attempts'] += 1
+            await self._wait_for_bucket(channel_id)
+            try:
+                await item['channel'].send(embeds=item['embeds'])
+                self.stats['delivered'] += 1
+                return
+            except (discord.Forbidden, discord.NotFound) as e:
+                # The channel is gone or we lost access - retrying won't help
+                print(f"❌ Dropping notification for channel {channel_id}: {e}")
+                self.stats['dropped'] += 1
+                return
+            except discord.HTTPException as e:
+                if e.status != 429 and e.status < 500:
+                    print(f"❌ Dropping notification for channel {channel_id}: {e}")
+                    self.stats['dropped'] += 1
+                    return
+                error = f"HTTP {e.status}"
+                retry_after = getattr(e, 'retry_after', None) or 2 ** item['attempts']
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                error = str(e) or type(e).__name__
+                retry_after = 2 ** item['attempts']
+            
+            if item['attempts'] < max_attempts:
+                print(f"⚠️ Notification send failed for channel {channel_id} ({error}), retrying in {retry_after:.1f}s")
+                self.stats['retried'] += 1
+                await asyncio.sleep(retry_after)
+            else:
+                print(f"❌ Notification for channel {channel_id} failed after {max_attempts} attempts ({error})")
+        
+        self.record_undelivered(channel_id, item)
+    
+    def record_undelivered(self, channel_id, item):
+        """Keep a message that could not be delivered so it survives a restart"""
+        self.undelivered.append({
+            'channel_id': channel_id,
+            'priority': item['priority'],
+            'embeds': [embed.to_dict() for embed in item['embeds']],
+            'failed_at': datetime.now().isoformat()
+        })
+        self.stats['undelivered'] += 1
+        self.save_undelivered()
+    
+    def save_undelivered(self):
+        """Save undelivered notifications to file"""
+        try:
+            with open(monitoring_config['undelivered_file'], 'w') as f:
+                json.dump(self.undelivered, f, indent=2)
+        except Exception as e:
+            print(f"Error saving undelivered notifications: {e}")
+    
+    def restore_undelivered(self, get_channel):
+        """Re-queue notifications persisted by a previous run"""
+        try:
+            if os.path.exists(monitoring_config['undelivered_file']):
+                with open(monitoring_config['undelivered_file'], 'r') as f:
+                    self.undelivered = json.load(f)
+        except Exception as e:
+            print(f"Error loading undelivered notifications: {e}")
+            return 0
+        
+        restored = 0
+        remaining = []
+        for entry in self.undelivered:
+            channel = get_channel(entry['channel_id'])
+            if not channel:
+                remaining.append(entry)
+                continue
+            embeds = [discord.Embed.from_dict(embed) for embed in entry['embeds']]
+            self.enqueue(channel, embeds, entry.get('priority', self.PRIORITY_ALERT))
+            restored += 1
+        
+        self.undelivered = remaining
+        self.save_undelivered()
+        if restored:
+            print(f"📬 Re-queued {restored} undelivered notifications")
+        return restored
+
 # Discord bot setup - fix privileged intents issue
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = False  # Disable privileged intent
 intents.presences = False  # Disable privileged intent
-bot = commands.Bot(command_prefix='!', intents=intents, help_command=None)
+if shard_config['sharded']:
+    # Explicit shard IDs let several processes each run part of the bot
+    bot = commands.AutoShardedBot(
+        command_prefix='!', intents=intents, help_command=None,
+        shard_count=shard_config['shard_count'], shard_ids=shard_config['shard_ids']
+    )
+else:
+    bot = commands.Bot(command_prefix='!', intents=intents, help_command=None)
 
 # Global variables for bot state
 monitor = DiscordInstagramMonitor()
 ban_watch_list = {}  # {channel_id: {username: {data}}}
 unban_watch_list = {}  # {channel_id: {username: {data}}}
 monitoring_data = {}  # Persistent storage
+channel_guilds = {}  # {channel_id: guild_id} - used to partition watches between shard processes
+notification_dispatcher = NotificationDispatcher()
+
+# Channel routing table - watched channels are resolved once and refreshed from gateway events
+channel_routes = {}  # {channel_id: channel}
+quarantined_channels = {}  # {channel_id: {'since': iso, 'reason': str}} - watches suspended
 
 # Load/Save monitoring data
+def is_local_channel(channel_id):
+    """Whether this process handles a watched channel (unknown channels are kept until resolved)"""
+    guild_id = channel_guilds.get(channel_id)
+    return guild_id is None or owns_guild(guild_id)
+
 def load_monitoring_data():
     """Load monitoring data from file"""
     global monitoring_data, ban_watch_list, unban_watch_list
@@ -904,14 +1422,55 @@ def load_monitoring_data():
             with open('discord_monitor_data.json', 'r') as f:
                 data = json.load(f)
                 monitoring_data = data.get('monitoring_data', {})
-                ban_watch_list = {int(k): v for k, v in data.get('ban_watch_list', {}).items()}
-                unban_watch_list = {int(k): v for k, v in data.get('unban_watch_list', {}).items()}
+                channel_guilds.update({int(k): v for k, v in data.get('channel_guilds', {}).items()})
+                # In a sharded deployment only this process's guilds are loaded
+                ban_watch_list = {int(k): v for k, v in data.get('ban_watch_list', {}).items() if is_local_channel(int(k))}
+                unban_watch_list = {int(k): v for k, v in data.get('unban_watch_list', {}).items() if is_local_channel(int(k))}
+                guild_notification_routing.clear()
+                guild_notification_routing.update({
+                    int(guild_id): {kind: int(channel_id) for kind, channel_id in routes.items()}
+                    for guild_id, routes in data.get('notification_routing', {}).items()
+                    if owns_guild(int(guild_id))
+                })
+                # Cached URLs are re-verified before first use
+                asset_url_cache.update({
+                    name: {'url': entry['url'], 'verified_at': 0}
+                    for name, entry in data.get('asset_cache', {}).items()
+                    if name in command_assets and entry.get('url')
+                })
     except Exception as e:
         print(f"Error loading data: {e}")
         monitoring_data = {}
         ban_watch_list = {}
         unban_watch_list = {}
 
+def merge_shard_data(data, stored):
+    """Combine this process's partition with the other shards' data already on disk"""
+    def owned_channel(channel_id, local):
+        guild_id = channel_guilds.get(channel_id)
+        return channel_id in local or (guild_id is not None and owns_guild(guild_id))
+    
+    for key, local in [('ban_watch_list', ban_watch_list), ('unban_watch_list', unban_watch_list)]:
+        merged = {k: v for k, v in stored.get(key, {}).items() if not owned_channel(int(k), local)}
+        merged.update({str(k): v for k, v in local.items()})
+        data[key] = merged
+    
+    routing = {k: v for k, v in stored.get('notification_routing', {}).items() if not owns_guild(int(k))}
+    routing.update({str(k): v for k, v in guild_notification_routing.items()})
+    data['notification_routing'] = routing
+    
+    data['channel_guilds'] = {**stored.get('channel_guilds', {}), **data['channel_guilds']}
+    data['asset_cache'] = {**stored.get('asset_cache', {}), **data['asset_cache']}
+    data['monitoring_data'] = {**stored.get('monitoring_data', {}), **data['monitoring_data']}
+    return data
+
+def write_data_file(data):
+    """Write the data file atomically so a crash or another shard never sees it half-written"""
+    temp_file = f"discord_monitor_data.json.{os.getpid()}.tmp"
+    with open(temp_file, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(temp_file, 'discord_monitor_data.json')
+
 def save_monitoring_data():
     """Save monitoring data to file"""
     try:
@@ -919,13 +1478,188 @@ def save_monitoring_data():
             'monitoring_data': monitoring_data,
             'ban_watch_list': ban_watch_list,
             'unban_watch_list': unban_watch_list,
+            'notification_routing': guild_notification_routing,
+            'channel_guilds': {str(k): v for k, v in channel_guilds.items()},
+            'asset_cache': {name: {'url': entry['url']} for name, entry in asset_url_cache.items()},
             'last_updated': datetime.now().isoformat()
         }
-        with open('discord_monitor_data.json', 'w') as f:
-            json.dump(data, f, indent=2)
+        
+        if is_partitioned():
+            # Other shard processes share the file - merge our partition under a lock
+            with open('discord_monitor_data.json.lock', 'w') as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                if os.path.exists('discord_monitor_data.json'):
+                    with open('discord_monitor_data.json', 'r') as f:
+                        data = merge_shard_data(data, json.load(f))
+                write_data_file(data)
+        else:
+            write_data_file(data)
     except Exception as e:
         print(f"Error saving data: {e}")
 
+async def asset_url_resolves(url):
+    """Check that a cached attachment URL is still served by the CDN"""
+    try:
+        timeout = aiohttp.ClientTimeout(total=5)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with session.head(url, allow_redirects=True) as response:
+                return response.status == 200
+    except Exception:
+        return False
+
+def remember_asset_url(asset_name, message):
+    """Store the CDN URL of an asset uploaded with a message"""
+    filename = os.path.basename(command_assets[asset_name])
+    for attachment in message.attachments:
+        if attachment.filename == filename:
+            asset_url_cache[asset_name] = {'url': attachment.url, 'verified_at': time.time()}
+            save_monitoring_data()
+            print(f"🖼️ Cached asset '{asset_name}' at {attachment.url}")
+            return attachment.url
+    return None
+
+async def get_asset_url(asset_name):
+    """Return a working CDN URL for an asset, uploading it to the storage channel if needed"""
+    lock = asset_upload_locks.setdefault(asset_name, asyncio.Lock())
+    async with lock:
+        entry = asset_url_cache.get(asset_name)
+        if entry:
+            if time.time() - entry['verified_at'] < monitoring_config['asset_verify_interval']:
+                return entry['url']
+            if await asset_url_resolves(entry['url']):
+                entry['verified_at'] = time.time()
+                return entry['url']
+            print(f"🖼️ Cached asset '{asset_name}' no longer resolves - re-uploading")
+            del asset_url_cache[asset_name]
+        
+        storage_channel = bot.get_channel(monitoring_config['asset_channel_id']) if monitoring_config['asset_channel_id'] else None
+        if not storage_channel:
+            return None  # Caller uploads it alongside the first message instead
+        
+        try:
+            message = await storage_channel.send(file=discord.File(command_assets[asset_name]))
+            return remember_asset_url(asset_name, message)
+        except Exception as e:
+            print(f"❌ Error uploading asset '{asset_name}': {e}")
+            return None
+
+async def send_with_asset(destination, embed, asset_name='command_gif'):
+    """Send an embed showing a command asset, uploading the file only when no cached URL works"""
+    url = await get_asset_url(asset_name)
+    if url:
+        embed.set_image(url=url)
+        return await destination.send(embed=embed)
+    
+    # First use: upload with this message and remember the attachment URL
+    path = command_assets[asset_name]
+    filename = os.path.basename(path)
+    embed.set_image(url=f"attachment://{filename}")
+    message = await destination.send(embed=embed, file=discord.File(path, filename=filename))
+    remember_asset_url(asset_name, message)
+    return message
+
+async def edit_with_asset(message, embed, asset_name='command_gif'):
+    """Edit a message sent by send_with_asset, keeping its asset image"""
+    filename = os.path.basename(command_assets[asset_name])
+    if any(attachment.filename == filename for attachment in message.attachments):
+        # This message holds the uploaded file itself, so keep pointing at it
+        embed.set_image(url=f"attachment://{filename}")
+    elif asset_name in asset_url_cache:
+        embed.set_image(url=asset_url_cache[asset_name]['url'])
+    return await message.edit(embed=embed)
+
+def resolve_channel(channel_id):
+    """Resolve a channel we can post to, returning (channel, None) or (None, reason)"""
+    channel = bot.get_channel(channel_id)
+    if not channel:
+        return None, "channel not found"
+    if not hasattr(channel, 'send'):
+        return None, "channel cannot send messages"
+    guild = getattr(channel, 'guild', None)
+    if guild and guild.me and not channel.permissions_for(guild.me).send_messages:
+        return None, "missing Send Messages permission"
+    return channel, None
+
+def refresh_channel_route(channel_id):
+    """Re-resolve one watched channel, quarantining it when it can no longer be used"""
+    channel, reason = resolve_channel(channel_id)
+    if channel:
+        channel_routes[channel_id] = channel
+        if getattr(channel, 'guild', None):
+            channel_guilds[channel_id] = channel.guild.id
+        if quarantined_channels.pop(channel_id, None):
+            print(f"✅ Channel {channel.name} ({channel_id}) is reachable again - resuming its watches")
+        return channel
+    
+    channel_routes.pop(channel_id, None)
+    if is_partitioned() and channel_id not in channel_guilds and 0 not in shard_config['shard_ids']:
+        # Unknown guild that isn't ours - leave it to another shard (shard 0 handles dead ones)
+        ban_watch_list.pop(channel_id, None)
+        unban_watch_list.pop(channel_id, None)
+        return None
+    if channel_id not in quarantined_channels:
+        quarantined_channels[channel_id] = {'since': datetime.now().isoformat(), 'reason': reason}
+        watch_count = len(ban_watch_list.get(channel_id, {})) + len(unban_watch_list.get(channel_id, {}))
+        print(f"⏸️ Channel {channel_id} quarantined ({reason}) - suspending {watch_count} watches. Use !setchannel in a valid channel to move them.")
+    return None
+
+def refresh_channel_routes(channel_ids=None):
+    """Re-resolve watched channels (all of them by default)"""
+    if channel_ids is None:
+        channel_ids = set(ban_watch_list) | set(unban_watch_list)
+    for channel_id in channel_ids:
+        refresh_channel_route(channel_id)
+
+def get_channel_route(channel_id):
+    """Look up a watched channel in the routing table, resolving it the first time it is seen"""
+    channel = channel_routes.get(channel_id)
+    if channel or channel_id in quarantined_channels:
+        return channel
+    return refresh_channel_route(channel_id)
+
+def watched_channels_in_guild(guild_id):
+    """Watched channel IDs currently routed to a guild"""
+    return [channel_id for channel_id, channel in channel_routes.items() if getattr(channel, 'guild', None) and channel.guild.id == guild_id]
+
+def refresh_notification_routes(guild_ids=None):
+    """Resolve the per-guild ban/unban notification channels into the route cache"""
+    if guild_ids is None:
+        notification_routes.clear()
+        guild_ids = list(guild_notification_routing)
+    
+    for guild_id in guild_ids:
+        routes = {}
+        for kind, channel_id in guild_notification_routing.get(guild_id, {}).items():
+            channel, reason = resolve_channel(channel_id)
+            if channel:
+                routes[kind] = channel
+            else:
+                print(f"⚠️ {kind.title()} notification channel {channel_id} for guild {guild_id} unavailable ({reason}) - using monitoring channels")
+        if routes:
+            notification_routes[guild_id] = routes
+        else:
+            notification_routes.pop(guild_id, None)
+
+def get_notification_channel(channel, kind):
+    """Pick where a 'ban' or 'unban' notification for a watch in this channel goes"""
+    guild = getattr(channel, 'guild', None)
+    if guild:
+        target = notification_routes.get(guild.id, {}).get(kind)
+        if target:
+            return target
+    return channel
+
+def set_guild_notification_channel(guild_id, kind, channel_id):
+    """Route one guild's ban or unban notifications to a channel"""
+    guild_notification_routing.setdefault(guild_id, {})[kind] = channel_id
+    save_monitoring_data()
+    refresh_notification_routes([guild_id])
+
+def is_notification_channel(channel_id):
+    """Whether any guild routes notifications to this channel"""
+    return any(channel_id in routes.values() for routes in guild_notification_routing.values())
+
 @bot.event
 async def on_ready():
     """Bot startup event"""
@@ -936,6 +1670,39 @@ async def on_ready():
     
     # Load existing data
     load_monitoring_data()
+    restored_results = load_result_cache()
+    if restored_results:
+        print(f'{Fore.WHITE}Restored {restored_results} recent check results')
+    
+    # Resolve every watched channel once
+    channel_routes.clear()
+    quarantined_channels.clear()
+    refresh_channel_routes()
+    refresh_notification_routes()
+    print(f'{Fore.WHITE}Channels: {len(channel_routes)} routed, {len(quarantined_channels)} quarantined')
+    
+    # Retry notifications that could not be delivered before the last shutdown
+    notification_dispatcher.restore_undelivered(bot.get_channel)
+    
+    # Announce transitions a cycle interrupted by the last shutdown had already found
+    interrupted = load_pending_transitions(bot.get_channel)
+    if interrupted:
+        announced = await flush_notification_digests(interrupted, datetime.now())
+        save_pending_transitions({})
+        print(f'{Fore.WHITE}Announced {announced} transitions from an interrupted cycle')
+    
+    # Nothing outside this process can reach the memory:// coordinator - check its leases here
+    if check_coordinator and monitoring_config['coordinator_url'].startswith('memory://') and not local_lease_workers:
+        local_lease_workers.extend(start_local_workers(
+            check_coordinator, lambda username: check_with_shared_cache(username)[1], monitoring_config['max_concurrent_checks']
+        ))
+        print(f'{Fore.YELLOW}Coordinator is memory:// - {len(local_lease_workers)} lease workers run in this process')
+    
+    # Open connections to Instagram before the first checks need them
+    timings = await check_executor.run(warm_up, monitor.session)
+    print(f'{Fore.WHITE}Connections warmed: ' + ', '.join(
+        f"{host} {seconds:.2f}s" if seconds is not None else f"{host} unreachable" for host, seconds in timings.items()
+    ))
     
     # Start background monitoring
     if not background_monitor.is_running():
@@ -943,23 +1710,63 @@ async def on_ready():
     
     print(f'{Fore.GREEN}Background monitoring started')
 
+@bot.event
+async def on_guild_channel_delete(channel):
+    """Quarantine watched channels as soon as they are deleted"""
+    if channel.id in ban_watch_list or channel.id in unban_watch_list:
+        refresh_channel_route(channel.id)
+    if is_notification_channel(channel.id):
+        refresh_notification_routes([channel.guild.id])
+
+@bot.event
+async def on_guild_channel_update(before, after):
+    """Re-check a watched channel when its permissions change"""
+    if after.id in ban_watch_list or after.id in unban_watch_list:
+        refresh_channel_route(after.id)
+    if is_notification_channel(after.id):
+        refresh_notification_routes([after.guild.id])
+
+@bot.event
+async def on_guild_role_update(before, after):
+    """Role permission changes can grant or revoke our access to a guild's channels"""
+    refresh_channel_routes(watched_channels_in_guild(after.guild.id) + [
+        channel_id for channel_id in quarantined_channels if bot.get_channel(channel_id)
+    ])
+    if after.guild.id in guild_notification_routing:
+        refresh_notification_routes([after.guild.id])
+
+@bot.event
+async def on_guild_remove(guild):
+    """Quarantine every watched channel of a guild we were removed from"""
+    refresh_channel_routes(watched_channels_in_guild(guild.id))
+    notification_routes.pop(guild.id, None)
+
+@bot.event
+async def on_guild_join(guild):
+    """Rejoining a guild may bring quarantined channels back"""
+    refresh_channel_routes(list(quarantined_channels))
+    if guild.id in guild_notification_routing:
+        refresh_notification_routes([guild.id])
+
 @bot.command(name='setbanchannel')
 async def set_ban_notification_channel(ctx):
-    """Set the current channel for ban notifications"""
-    global ban_notification_channel_id
+    """Set the current channel for this server's ban notifications"""
+    if not ctx.guild:
+        await ctx.send("❌ This command can only be used in a server channel.")
+        return
     try:
-        ban_notification_channel_id = ctx.channel.id
+        set_guild_notification_channel(ctx.guild.id, 'ban', ctx.channel.id)
         
         embed = discord.Embed(
             title="🚫 Ban Channel Set Successfully",
-            description=f"This channel ({ctx.channel.name}) will now receive all ban notifications.",
+            description=f"This channel ({ctx.channel.name}) will now receive all ban notifications for this server.",
             color=0xff0000
         )
         embed.add_field(name="Channel ID", value=str(ctx.channel.id), inline=True)
         embed.add_field(name="Notification Type", value="Ban notifications only", inline=True)
         
         await ctx.send(embed=embed)
-        print(f"✅ Ban notification channel set to {ctx.channel.name} ({ctx.channel.id}) by {ctx.author}")
+        print(f"✅ Ban notification channel for guild {ctx.guild.id} set to {ctx.channel.name} ({ctx.channel.id}) by {ctx.author}")
         
     except Exception as e:
         embed = discord.Embed(
@@ -971,21 +1778,23 @@ async def set_ban_notification_channel(ctx):
 
 @bot.command(name='setunbanchannel')
 async def set_unban_notification_channel(ctx):
-    """Set the current channel for unban notifications"""
-    global unban_notification_channel_id
+    """Set the current channel for this server's unban notifications"""
+    if not ctx.guild:
+        await ctx.send("❌ This command can only be used in a server channel.")
+        return
     try:
-        unban_notification_channel_id = ctx.channel.id
+        set_guild_notification_channel(ctx.guild.id, 'unban', ctx.channel.id)
         
         embed = discord.Embed(
             title="✅ Unban Channel Set Successfully",
-            description=f"This channel ({ctx.channel.name}) will now receive all unban/recovery notifications.",
+            description=f"This channel ({ctx.channel.name}) will now receive all unban/recovery notifications for this server.",
             color=0x00ff00
         )
         embed.add_field(name="Channel ID", value=str(ctx.channel.id), inline=True)
         embed.add_field(name="Notification Type", value="Unban/recovery notifications only", inline=True)
         
         await ctx.send(embed=embed)
-        print(f"✅ Unban notification channel set to {ctx.channel.name} ({ctx.channel.id}) by {ctx.author}")
+        print(f"✅ Unban notification channel for guild {ctx.guild.id} set to {ctx.channel.name} ({ctx.channel.id}) by {ctx.author}")
         
     except Exception as e:
         embed = discord.Embed(
@@ -1043,9 +1852,10 @@ async def help_command(ctx):
     embed.add_field(
         name="Monitoring Commands",
         value="""
-        `!check <username>` - Check account status once
+        `!check <username> [--fresh]` - Check account status once
         `!bancheck <username>` - Monitor for account bans
         `!unbancheck <username>` - Monitor for account unbans
+        `!bulkwatch <ban|unban> <usernames...>` - Monitor many accounts (or attach a .txt/.csv)
         `!remove <username>` - Stop monitoring account
         """,
         inline=False
@@ -1072,23 +1882,117 @@ async def help_command(ctx):
     )
     
     embed.set_footer(text="Advanced rate limiting and change detection included")
-    await ctx.send(embed=embed, file=discord.File('attached_assets/naruto-shippuden-itachi-uchiha-amaterasu-eyes-paimcqzrmjzhp025_1756983756974.gif'))
+    await send_with_asset(ctx, embed)
+
+def format_result_age(seconds):
+    """Format the age of a stored check result"""
+    seconds = int(max(0, seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes}m"
+
+def build_check_embed(username, result, author, age_seconds=None, refreshing=False):
+    """Build the !check result embed"""
+    if result['status'] in ['active_public', 'active_private']:
+        color = 0x00ff00 if result['status'] == 'active_public' else 0x0099ff
+        status_text = "Active (Public)" if result['status'] == 'active_public' else "Active (Private)"
+        
+        embed = discord.Embed(
+            title=f"@{username}",
+            description=f"Account Status Check",
+            color=color,
+            timestamp=datetime.now()
+        )
+        
+        embed.add_field(name="Username", value=f"@{username}", inline=True)
+        embed.add_field(name="Current Status", value=f"Active - {status_text}", inline=True)
+        embed.add_field(name="Check Type", value="One-time Check", inline=True)
+        
+        # Always show profile info for active accounts
+        followers = result.get('followers', 0)
+        following = result.get('following', 0)
+        posts = result.get('posts', 0)
+        
+        if followers and int(followers) > 0:
+            embed.add_field(
+                name="Profile Info",
+                value=f"{monitor.format_number(int(followers))} followers, {monitor.format_number(int(following))} following, {monitor.format_number(int(posts))} posts",
+                inline=False
+            )
+        
+        # Add verification status
+        if result.get('verified'):
+            embed.add_field(name="Verified", value="Yes", inline=True)
+        
+    else:
+        # Banned/Not found account
+        embed = discord.Embed(
+            title=f"@{username}",
+            description=f"Account Status Check",
+            color=0xff0000,
+            timestamp=datetime.now()
+        )
+        
+        embed.add_field(name="Username", value=f"@{username}", inline=True)
+        embed.add_field(name="Current Status", value=f"Banned - {result['status'].replace('_', ' ').title()}", inline=True)
+        embed.add_field(name="Check Type", value="One-time Check", inline=True)
+        
+        if result.get('reason'):
+            embed.add_field(name="Additional Info", value=str(result['reason']), inline=False)
+    
+    footer = f"Checked by {author.display_name}"
+    if age_seconds is None:
+        footer += " | Live check"
+    else:
+        footer += f" | Result from {format_result_age(age_seconds)} ago"
+        if refreshing:
+            footer += " | Refreshing..."
+    embed.set_footer(text=footer)
+    return embed
+
+async def refresh_check_message(message, username, author):
+    """Re-check a username in the background and update a !check reply in place"""
+    try:
+        result = await run_live_check(username, lane='interactive')
+        await edit_with_asset(message, build_check_embed(username, result, author))
+    except Exception as e:
+        print(f"❌ Error refreshing check for {username}: {e}")
 
 @bot.command(name='check')
-async def check_account(ctx, username: str = None):
-    """Check a single Instagram account status"""
+async def check_account(ctx, *, user_input: str = None):
+    """Check a single Instagram account status - answers from recent results unless --fresh is given"""
+    args = user_input.split() if user_input else []
+    fresh = '--fresh' in args
+    targets = [arg for arg in args if arg != '--fresh']
+    username = extract_username_from_url(targets[0]) if targets else None
+    
     if not username:
         embed = discord.Embed(
             title="Error",
-            description="Please provide a username!\nUsage: `!check <username>`",
+            description="Please provide a username!\nUsage: `!check <username> [--fresh]`",
             color=0xff0000
         )
-        await ctx.send(embed=embed, file=discord.File('attached_assets/naruto-shippuden-itachi-uchiha-amaterasu-eyes-paimcqzrmjzhp025_1756983756974.gif'))
-        await ctx.send(embed=embed)
+        await send_with_asset(ctx, embed)
         return
     
-    # Remove @ if present
-    username = username.lstrip('@')
+    # Answer from the most recent stored result when there is one
+    stored = None if fresh else get_stored_result(username)
+    if stored:
+        checked_at, result = stored
+        age = (datetime.now() - checked_at).total_seconds()
+        # Nonexistent names are negatively cached for longer so repeated checks don't each cost a request
+        fresh_window = status_cache_ttl('not_found') if result.get('status') == 'not_found' else monitoring_config['check_fresh_window']
+        refreshing = age > fresh_window
+        message = await send_with_asset(ctx, build_check_embed(username, result, ctx.author, age, refreshing))
+        if refreshing:
+            task = asyncio.create_task(refresh_check_message(message, username, ctx.author))
+            background_refreshes.add(task)
+            task.add_done_callback(background_refreshes.discard)
+        return
     
     # Send checking message
     checking_embed = discord.Embed(
@@ -1096,62 +2000,12 @@ async def check_account(ctx, username: str = None):
         description=f"Checking @{username}...",
         color=0xffa500
     )
-    message = await ctx.send(embed=checking_embed, file=discord.File('attached_assets/naruto-shippuden-itachi-uchiha-amaterasu-eyes-paimcqzrmjzhp025_1756983756974.gif'))
+    message = await send_with_asset(ctx, checking_embed)
     
     # Check the account
     try:
-        result = monitor.check_username_status(username)
-        
-        # Create result embed
-        if result['status'] in ['active_public', 'active_private']:
-            color = 0x00ff00 if result['status'] == 'active_public' else 0x0099ff
-            status_text = "Active (Public)" if result['status'] == 'active_public' else "Active (Private)"
-            
-            embed = discord.Embed(
-                title=f"@{username}",
-                description=f"Account Status Check",
-                color=color,
-                timestamp=datetime.now()
-            )
-            
-            embed.add_field(name="Username", value=f"@{username}", inline=True)
-            embed.add_field(name="Current Status", value=f"Active - {status_text}", inline=True)
-            embed.add_field(name="Check Type", value="One-time Check", inline=True)
-            
-            # Always show profile info for active accounts
-            followers = result.get('followers', 0)
-            following = result.get('following', 0)
-            posts = result.get('posts', 0)
-            
-            if followers and int(followers) > 0:
-                embed.add_field(
-                    name="Profile Info",
-                    value=f"{monitor.format_number(int(followers))} followers, {monitor.format_number(int(following))} following, {monitor.format_number(int(posts))} posts",
-                    inline=False
-                )
-            
-            # Add verification status
-            if result.get('verified'):
-                embed.add_field(name="Verified", value="Yes", inline=True)
-            
-        else:
-            # Banned/Not found account
-            embed = discord.Embed(
-                title=f"@{username}",
-                description=f"Account Status Check",
-                color=0xff0000,
-                timestamp=datetime.now()
-            )
-            
-            embed.add_field(name="Username", value=f"@{username}", inline=True)
-            embed.add_field(name="Current Status", value=f"Banned - {result['status'].replace('_', ' ').title()}", inline=True)
-            embed.add_field(name="Check Type", value="One-time Check", inline=True)
-            
-            if result.get('reason'):
-                embed.add_field(name="Additional Info", value=str(result['reason']), inline=False)
-        
-        embed.set_footer(text=f"Checked by {ctx.author.display_name}")
-        await message.edit(embed=embed, attachments=[discord.File('attached_assets/naruto-shippuden-itachi-uchiha-amaterasu-eyes-paimcqzrmjzhp025_1756983756974.gif')])
+        result = await run_live_check(username, use_shared_cache=not fresh, lane='interactive')
+        await edit_with_asset(message, build_check_embed(username, result, ctx.author))
         
     except Exception as e:
         error_embed = discord.Embed(
@@ -1200,17 +2054,11 @@ async def ban_check(ctx, *, user_input: str = None):
         await ctx.send(embed=embed)
         return
     
-    # Do initial check
-    result = monitor.check_username_status(username)
+    # Do initial check - ahead of the background sweep
+    result = await run_live_check(username, lane='interactive')
     
     # Add to watch list
-    ban_watch_list[channel_id][username] = {
-        'added_by': ctx.author.id,
-        'added_at': datetime.now().isoformat(),
-        'last_status': result['status'],
-        'last_check': datetime.now().isoformat(),
-        'initial_data': result
-    }
+    ban_watch_list[channel_id][username] = new_watch_entry(ctx.author.id, result)
     
     save_monitoring_data()
     
@@ -1259,23 +2107,172 @@ async def unban_check(ctx, *, user_input: str = None):
         await ctx.send(embed=embed)
         return
     
-    # Do initial check
-    result = monitor.check_username_status(username)
+    # Do initial check - ahead of the background sweep
+    result = await run_live_check(username, lane='interactive')
     
     # Add to unban watch list
-    unban_watch_list[channel_id][username] = {
-        'added_by': ctx.author.id,
-        'added_at': datetime.now().isoformat(),
-        'last_status': result['status'],
-        'last_check': datetime.now().isoformat(),
-        'initial_data': result
-    }
+    unban_watch_list[channel_id][username] = new_watch_entry(ctx.author.id, result)
     
     save_monitoring_data()
     
     # Send monitoring status notification to general channel (screenshot format)
     await send_monitoring_status(ctx.channel, username)
 
+def parse_bulk_usernames(text, existing):
+    """Validate and deduplicate usernames/URLs for a bulk import"""
+    usernames = []
+    invalid = []
+    duplicates = 0
+    already_monitored = 0
+    seen = set()
+    existing_lower = {name.lower() for name in existing}
+    
+    tokens = [token for token in re.split(r'[\s,;]+', text) if token]
+    if tokens and tokens[0].lower() == 'username':
+        tokens = tokens[1:]  # CSV header
+    
+    for token in tokens:
+        username = extract_username_from_url(token.strip('"\''))
+        if not is_valid_username(username):
+            invalid.append(token)
+            continue
+        key = username.lower()
+        if key in seen:
+            duplicates += 1
+            continue
+        seen.add(key)
+        if key in existing_lower:
+            already_monitored += 1
+            continue
+        usernames.append(username)
+    
+    return usernames, invalid, duplicates, already_monitored
+
+def build_bulk_progress_embed(mode, done, total, results, finished=False):
+    """Build the progress/summary embed for !bulkwatch"""
+    errors = sum(1 for result in results.values() if result['status'] not in ['active_public', 'active_private', 'not_found', 'banned'])
+    embed = discord.Embed(
+        title="📥 Bulk Import Complete" if finished else "📥 Bulk Import In Progress",
+        description=f"{mode.title()} monitoring: checked {done}/{total} accounts",
+        color=0x00ff00 if finished else 0xffa500
+    )
+    if results:
+        status_counts = {}
+        for result in results.values():
+            status_counts[result['status']] = status_counts.get(result['status'], 0) + 1
+        embed.add_field(
+            name="Initial Status",
+            value="\n".join(f"{status.replace('_', ' ').title()}: {count}" for status, count in sorted(status_counts.items())),
+            inline=True
+        )
+    if errors:
+        embed.add_field(name="Check Errors", value=str(errors), inline=True)
+    return embed
+
+@bot.command(name='bulkwatch')
+async def bulk_watch(ctx, mode: str = None, *, user_input: str = ''):
+    """Start monitoring many accounts at once - usernames/URLs inline or in an attached text/CSV file"""
+    if mode not in ['ban', 'unban']:
+        embed = discord.Embed(
+            title="❌ Error",
+            description="Usage: `!bulkwatch <ban|unban> <usernames/URLs...>`\nYou can also attach a .txt or .csv file with one account per line.",
+            color=0xff0000
+        )
+        await ctx.send(embed=embed)
+        return
+    
+    # Collect input from the message and any attached text/CSV files
+    text = user_input or ''
+    for attachment in ctx.message.attachments:
+        if not attachment.filename.lower().endswith(('.txt', '.csv')):
+            continue
+        if attachment.size > 1024 * 1024:
+            await ctx.send(f"❌ {attachment.filename} is too large (max 1 MB)")
+            return
+        text += "\n" + (await attachment.read()).decode('utf-8', errors='ignore')
+    
+    watch_list = ban_watch_list if mode == 'ban' else unban_watch_list
+    channel_id = ctx.channel.id
+    usernames, invalid, duplicates, already_monitored = parse_bulk_usernames(text, watch_list.get(channel_id, {}))
+    
+    if len(usernames) > monitoring_config['bulk_import_limit']:
+        embed = discord.Embed(
+            title="❌ Too Many Accounts",
+            description=f"{len(usernames)} accounts given - the limit is {monitoring_config['bulk_import_limit']} per import.",
+            color=0xff0000
+        )
+        await ctx.send(embed=embed)
+        return
+    
+    if not usernames:
+        embed = discord.Embed(
+            title="⚠️ Nothing To Import",
+            description=f"No new valid usernames found ({len(invalid)} invalid, {duplicates} duplicates, {already_monitored} already monitored).",
+            color=0xffa500
+        )
+        await ctx.send(embed=embed)
+        return
+    
+    total = len(usernames)
+    results = {}
+    progress_message = await ctx.send(embed=build_bulk_progress_embed(mode, 0, total, results))
+    
+    # Stream usernames through a bounded queue; run_live_check applies the normal concurrency limit
+    queue = asyncio.Queue(maxsize=check_concurrency() * 2)
+    worker_count = min(check_concurrency(), total)
+    
+    async def producer():
+        for username in usernames:
+            await queue.put(username)
+        for _ in range(worker_count):
+            await queue.put(None)
+    
+    async def worker():
+        while True:
+            username = await queue.get()
+            if username is None:
+                return
+            try:
+                results[username] = await run_live_check(username)
+            except Exception as e:
+                results[username] = {'status': 'error', 'followers': 0, 'following': 0, 'posts': 0, 'verified': False, 'reason': f'Error: {str(e)[:50]}...'}
+    
+    async def reporter():
+        while True:
+            await asyncio.sleep(monitoring_config['bulk_progress_interval'])
+            try:
+                await progress_message.edit(embed=build_bulk_progress_embed(mode, len(results), total, results))
+            except Exception as e:
+                print(f"❌ Error updating bulk import progress: {e}")
+    
+    reporter_task = asyncio.create_task(reporter())
+    try:
+        await asyncio.gather(producer(), *(worker() for _ in range(worker_count)))
+    finally:
+        reporter_task.cancel()
+    
+    # Commit the whole import to the registry at once
+    channel_watches = watch_list.setdefault(channel_id, {})
+    for username in usernames:
+        channel_watches[username] = new_watch_entry(ctx.author.id, results[username])
+    save_monitoring_data()
+    
+    embed = build_bulk_progress_embed(mode, len(results), total, results, finished=True)
+    skipped = []
+    if already_monitored:
+        skipped.append(f"{already_monitored} already monitored")
+    if duplicates:
+        skipped.append(f"{duplicates} duplicates")
+    if invalid:
+        skipped.append(f"{len(invalid)} invalid")
+    embed.add_field(name="Added", value=str(total), inline=True)
+    if skipped:
+        embed.add_field(name="Skipped", value=", ".join(skipped), inline=True)
+    if invalid:
+        embed.add_field(name="Invalid Entries", value=", ".join(invalid[:10])[:1000] + (f" ... and {len(invalid) - 10} more" if len(invalid) > 10 else ""), inline=False)
+    await progress_message.edit(embed=embed)
+    print(f"📥 Bulk {mode} import of {total} accounts in channel {channel_id} by {ctx.author}")
+
 @bot.command(name='list')
 async def list_monitored(ctx):
     """Show all monitored accounts for this channel"""
@@ -1394,6 +2391,92 @@ async def show_stats(ctx):
     embed.add_field(name="🤖 Bot Mode", value="Simulation" if monitor.simulation_mode else "Live", inline=True)
     embed.add_field(name="🔄 Status", value="Online", inline=True)
     
+    if quarantined_channels:
+        embed.add_field(name="⏸️ Quarantined Channels", value=f"{len(quarantined_channels):,} (watches suspended)", inline=True)
+    
+    embed.add_field(
+        name="🔁 Confirmations",
+        value=f"{transition_stats['confirmed']:,} confirmed · {transition_stats['rejected']:,} rejected · {transition_stats['pending']:,} awaiting next cycle",
+        inline=True
+    )
+    
+    if pipeline_stats:
+        # Busiest stage per worker is the bottleneck
+        bottleneck = max(pipeline_stats, key=lambda stage: pipeline_stats[stage]['seconds'] / pipeline_stats[stage]['workers'])
+        embed.add_field(
+            name="🧪 Pipeline",
+            value=" → ".join(
+                f"{stage} {stats['seconds'] / max(1, stats['processed']):.2f}s/item (depth {stats['max_depth']})"
+                for stage, stats in pipeline_stats.items()
+            ) + f"\nBottleneck: {bottleneck}",
+            inline=False
+        )
+    
+    latency = check_latency_summary()
+    if latency:
+        embed.add_field(name="⌛ Check Latency", value=f"median {latency[0]:.1f}s · p95 {latency[1]:.1f}s · max {latency[2]:.1f}s", inline=True)
+    
+    embed.add_field(
+        name="⏱️ Scheduler",
+        value=f"last cycle {schedule_stats['last_cycle_seconds']:.0f}s · max lag {schedule_stats['max_lag']:.1f}s · {schedule_stats['overruns']} overruns",
+        inline=True
+    )
+    
+    guild_stats = guild_schedule_stats.get(ctx.guild.id) if ctx.guild else None
+    if guild_stats:
+        embed.add_field(
+            name="🏠 This Server",
+            value=f"{guild_stats['checked']:,} checked last cycle · backlog {guild_stats['backlog']:,} · lag {guild_stats['lag']:.0f}s",
+            inline=True
+        )
+    
+    executor_stats = check_executor.stats()
+    embed.add_field(
+        name="🧵 Check Threads",
+        value=f"{executor_stats['active']}/{executor_stats['workers']} busy · wait {executor_stats['queue_wait']:.2f}s · run {executor_stats['run_time']:.1f}s",
+        inline=True
+    )
+    
+    connections = monitor.session.connection_stats.stats()
+    embed.add_field(
+        name="🔌 Connections",
+        value=f"{connections['transport']} · {connections['connections']} opened for {connections['requests']} requests · {connections['reuse_rate']:.0%} reused",
+        inline=True
+    )
+    
+    bandwidth = monitor.session.bandwidth.summary()
+    if bandwidth:
+        embed.add_field(
+            name="📦 Bandwidth",
+            value="\n".join(
+                f"{method}: {calls} calls · {compressed / 1024:.0f} KB wire / {decompressed / 1024:.0f} KB body"
+                + (f" · {compressed / calls / 1024:.1f} KB/call" if calls else "")
+                for method, (calls, compressed, decompressed) in bandwidth.items()
+            ),
+            inline=False
+        )
+    
+    lanes = check_limiter.stats()
+    embed.add_field(
+        name="🚦 Check Lanes",
+        value=" · ".join(
+            f"{lane} {running} running/{waiting} waiting" + (f" ({median:.1f}s)" if median is not None else "")
+            for lane, (running, waiting, median) in lanes.items()
+        ),
+        inline=False
+    )
+    
+    cache_stats = monitoring_cache.stats()
+    embed.add_field(
+        name="🗃️ Result Cache",
+        value=f"{cache_stats['entries']:,}/{cache_stats['max_entries']:,} · {cache_stats['hit_rate']:.0%} hits · {cache_stats['evictions']:,} evicted",
+        inline=True
+    )
+    
+    if shard_config['sharded']:
+        shards = ', '.join(str(shard_id) for shard_id in (bot.shard_ids or [])) or 'all'
+        embed.add_field(name="🧩 Shards", value=f"{shards} of {bot.shard_count}", inline=True)
+    
     embed.set_footer(text=f"Monitoring since bot startup")
     await ctx.send(embed=embed)
 
@@ -1428,125 +2511,725 @@ async def clear_monitoring(ctx):
     )
     await ctx.send(embed=embed)
 
+def status_cache_ttl(status):
+    """Seconds a result with this status stays fresh"""
+    return monitoring_config['status_cache_ttl'].get(status, monitoring_config['cache_duration'])
+
+def store_check_result(username, result, checked_at=None):
+    """Remember the latest check result for a username"""
+    checked_at = checked_at or datetime.now()
+    # Results restored from disk or other processes are already partly aged
+    age = (datetime.now() - checked_at).total_seconds()
+    status = result.get('status')
+    # Definitive results stay available to !check for check_max_stale; failures only for their short TTL
+    if status in ['active_public', 'active_private', 'not_found', 'banned']:
+        ttl = max(status_cache_ttl(status), monitoring_config['check_max_stale'])
+    else:
+        # A failed check never replaces a known status
+        if get_stored_result(username):
+            return
+        ttl = status_cache_ttl(status)
+    monitoring_cache.set(f"check_{username}", (checked_at, result), ttl=ttl, age=age)
+
+def result_payload_hash(result):
+    """Short fingerprint of a check result, used to detect damaged cache entries"""
+    return hashlib.sha1(json.dumps(result, sort_keys=True).encode()).hexdigest()[:16]
+
+def save_result_cache():
+    """Write recent definitive check results to disk so a restart doesn't refetch every account"""
+    try:
+        entries = {}
+        for key, (checked_at, result) in list(monitoring_cache.items()):
+            if not key.startswith('check_') or result.get('status') not in ['active_public', 'active_private', 'not_found', 'banned']:
+                continue
+            if (datetime.now() - checked_at).total_seconds() > monitoring_config['check_max_stale']:
+                continue
+            entries[key[len('check_'):]] = {
+                'status': result['status'],
+                'followers': result.get('followers', 0),
+                'following': result.get('following', 0),
+                'posts': result.get('posts', 0),
+                'checked_at': checked_at.isoformat(),
+                'payload_hash': result_payload_hash(result),
+                'result': result
+            }
+        
+        temp_file = f"{monitoring_config['result_cache_file']}.{os.getpid()}.tmp"
+        with open(temp_file, 'w') as f:
+            json.dump(entries, f)
+        os.replace(temp_file, monitoring_config['result_cache_file'])
+    except Exception as e:
+        print(f"Error saving result cache: {e}")
+
+def load_result_cache():
+    """Restore check results saved by the previous run, skipping stale or damaged entries"""
+    try:
+        if not os.path.exists(monitoring_config['result_cache_file']):
+            return 0
+        with open(monitoring_config['result_cache_file'], 'r') as f:
+            entries = json.load(f)
+    except Exception as e:
+        print(f"Error loading result cache: {e}")
+        return 0
+    
+    restored = 0
+    for username, entry in entries.items():
+        try:
+            checked_at = datetime.fromisoformat(entry['checked_at'])
+            result = entry['result']
+        except (KeyError, TypeError, ValueError):
+            continue
+        if result_payload_hash(result) != entry.get('payload_hash'):
+            continue
+        if (datetime.now() - checked_at).total_seconds() > monitoring_config['check_max_stale']:
+            continue
+        current = monitoring_cache.get(f"check_{username}")
+        if current and current[0] >= checked_at:
+            continue
+        store_check_result(username, result, checked_at)
+        restored_check_results.add(username)
+        restored += 1
+    return restored
+
+def get_stored_result(username):
+    """Return (checked_at, result) for the latest usable result, or None if there is none recent enough"""
+    entry = monitoring_cache.get(f"check_{username}")
+    if not entry:
+        return None
+    checked_at, result = entry
+    if result.get('status') not in ['active_public', 'active_private', 'not_found', 'banned']:
+        return None
+    if (datetime.now() - checked_at).total_seconds() > monitoring_config['check_max_stale']:
+        return None
+    return entry
+
+def check_with_shared_cache(username, use_shared_cache=True):
+    """Check a username, reusing a recent result from another process when a shared cache is configured"""
+    if shared_result_cache and use_shared_cache:
+        cached = shared_result_cache.get(username, shard_config['shared_cache_ttl'])
+        if cached:
+            checked_at, result = cached
+            return datetime.fromtimestamp(checked_at), result
+    
+    result = monitor.check_username_status(username)
+    if shared_result_cache and result.get('status') in ['active_public', 'active_private', 'not_found', 'banned']:
+        shared_result_cache.put(username, result)
+    return datetime.now(), result
+
+async def run_worker_check(username, priority=2, method='status'):
+    """Publish a check job for the worker processes and wait for its result (lower priority runs first)"""
+    job_id = await asyncio.to_thread(check_job_queue.publish, username, priority, method)
+    future = worker_jobs.get(job_id)
+    if future is None:
+        future = asyncio.get_running_loop().create_future()
+        worker_jobs[job_id] = future
+    if not collect_worker_results.is_running():
+        collect_worker_results.start()
+    
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), timeout=monitoring_config['worker_result_timeout'])
+    except asyncio.TimeoutError:
+        return datetime.now(), {'status': 'error', 'followers': 0, 'following': 0, 'posts': 0, 'verified': False, 'reason': 'Check worker timeout'}
+
+@tasks.loop(seconds=0.5)
+async def collect_worker_results():
+    """Hand results published by the worker processes to the checks waiting for them"""
+    try:
+        results = await asyncio.to_thread(check_job_queue.collect_results)
+    except Exception as e:
+        print(f"❌ Error collecting worker results: {e}")
+        return
+    
+    for job_id, username, result, checked_at in results:
+        future = worker_jobs.pop(job_id, None)
+        if future and not future.done():
+            future.set_result((datetime.fromtimestamp(checked_at), result))
+        else:
+            # Nobody is waiting (e.g. published before a restart) - keep it for !check
+            store_check_result(username, result, datetime.fromtimestamp(checked_at))
+
+async def run_live_check(username, use_shared_cache=True, lane='background'):
+    """Run a live check off the event loop, sharing it with concurrent callers for the same username
+
+    lane is the check's priority: 'interactive' for commands, 'confirmation' or 'background'.
+    Without use_shared_cache (!check --fresh) the caller never joins a check that may answer from the cache.
+    """
+    live = live_checks.get(username)
+    if live is None or (not use_shared_cache and not live['fresh']):
+        method = 'status' if use_shared_cache else 'fresh'
+        
+        async def _check():
+            try:
+                if check_job_queue:
+                    checked_at, result = await run_worker_check(username, CheckLimiter.LANES.index(lane), method)
+                else:
+                    granted = await check_limiter.acquire(lane, username)
+                    try:
+                        checked_at, result = await check_executor.run(check_with_shared_cache, username, use_shared_cache)
+                    finally:
+                        check_limiter.release(granted)
+                store_check_result(username, result, checked_at)
+                return result
+            finally:
+                if live_checks.get(username) is live:
+                    live_checks.pop(username, None)
+        live = live_checks[username] = {'task': None, 'lane': lane, 'fresh': not use_shared_cache, 'method': method}
+        live['task'] = asyncio.create_task(_check())
+    elif CheckLimiter.LANES.index(lane) < CheckLimiter.LANES.index(live['lane']):
+        # A more urgent caller joins - move the shared check up, as the worker queue does for its jobs
+        live['lane'] = lane
+        if check_job_queue:
+            await asyncio.to_thread(check_job_queue.publish, username, CheckLimiter.LANES.index(lane), live['method'])
+        else:
+            check_limiter.promote(username, lane)
+    return await asyncio.shield(live['task'])
+
+async def run_confirmation_check(username, seen_by=None):
+    """Re-check a suspected status change right away, in the confirmation lane, starting with a different
+    method than seen_by - the one that produced the suspect result"""
+    if check_job_queue:
+        # Workers run 'fresh' jobs web scraping first and 'fallback' jobs mobile API first
+        method = 'fresh' if seen_by == 'mobile_api' else 'fallback'
+        checked_at, result = await run_worker_check(username, CheckLimiter.LANES.index('confirmation'), method)
+    else:
+        granted = await check_limiter.acquire('confirmation')
+        try:
+            result = await check_executor.run(monitor.check_with_other_method, username, seen_by)
+        finally:
+            check_limiter.release(granted)
+        checked_at = datetime.now()
+    store_check_result(username, result, checked_at)
+    return result
+
 async def check_account_cached(username, current_time):
     """Check account with caching support"""
     cache_key = f"check_{username}"
     
-    # Check cache first
-    if cache_key in monitoring_cache:
-        cache_time, cached_result = monitoring_cache[cache_key]
-        if (current_time - cache_time).seconds < monitoring_config['cache_duration']:
-            return cached_result
+    # Check cache first - each status has its own freshness window
+    cached = monitoring_cache.get(cache_key, max_age=lambda entry: status_cache_ttl(entry[1].get('status')))
+    if cached:
+        return cached[1]
     
     # If not in cache or expired, check and cache
-    result = await asyncio.to_thread(monitor.check_username_status, username)
-    monitoring_cache[cache_key] = (current_time, result)
-    return result
+    return await run_live_check(username)
 
-async def process_accounts_batch(accounts_data, current_time):
-    """Process a batch of accounts concurrently with rate limiting"""
-    semaphore = asyncio.Semaphore(monitoring_config['max_concurrent_checks'])
-    
-    async def check_single(item):
-        channel, username, data, account_type = item
-        async with semaphore:
-            try:
-                result = await check_account_cached(username, current_time)
-                previous_status = data['last_status']
-                current_status = result['status']
-                
-                if previous_status != current_status:
-                    print(f"[{current_time.strftime('%H:%M:%S')}] 🔄 {account_type.upper()} MONITOR {username}: {previous_status} -> {current_status}")
-                
-                # Update data
-                data['last_status'] = current_status
-                data['last_check'] = current_time.isoformat()
-                
-                # Determine if notification needed
-                active_statuses = ['active_public', 'active_private']
-                
-                if account_type == 'ban' and previous_status in active_statuses and current_status not in active_statuses:
-                    return await send_optimized_notification(channel, username, data, result, current_time, "banned")
-                elif account_type == 'ban' and previous_status not in active_statuses and current_status in active_statuses:
-                    return await send_optimized_notification(channel, username, data, result, current_time, "recovered")
-                elif account_type == 'unban' and previous_status not in active_statuses and current_status in active_statuses:
-                    return await send_optimized_notification(channel, username, data, result, current_time, "unbanned")
-                
-                return 0
-            except Exception as e:
-                print(f"❌ Error checking {username}: {e}")
-                return 0
-    
-    # Process in batches with small delay between batches
-    all_results = 0
-    for i in range(0, len(accounts_data), monitoring_config['batch_size']):
-        batch = accounts_data[i:i + monitoring_config['batch_size']]
-        tasks = [check_single(item) for item in batch]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        all_results += sum(result for result in results if isinstance(result, int))
+def record_check_latency(seconds):
+    """Remember how long one account check took, from dispatch to result"""
+    check_latencies.append(seconds)
+
+def check_latency_summary():
+    """Return (median, p95, max) seconds over recent account checks, or None"""
+    if not check_latencies:
+        return None
+    latencies = sorted(check_latencies)
+    return latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95)], latencies[-1]
+
+def build_notification_embed(username, data, result, current_time, notification_type):
+    """Build the notification embed for a single status transition"""
+    if notification_type == "banned":
+        # Match screenshot format: "Success! @username has been banned! ❌"
+        embed = discord.Embed(
+            title="Monitoring Status",
+            description=f"Success! @{username} has been banned! ❌",
+            color=0xff0000,
+            timestamp=current_time
+        )
+        embed.set_footer(text="Instagram Monitor Bot")
+        
+    elif notification_type in ["recovered", "unbanned"]:
+        # Match screenshot format: "Account Recovered | @username ✅✔️ | Followers: 1381 | ⏱️ Time taken: 16 hours, 22 minutes, 14 seconds"
+        duration_text = calculate_duration(data.get('added_at'), current_time)
+        
+        # Get follower count from result or initial data
+        initial_data = data.get('initial_data', {})
+        followers = result.get('followers', 0) or initial_data.get('followers', 0)
+        
+        description = f"Account Recovered | @{username} ✅✔️"
+        if followers and int(followers) > 0:
+            description += f" | Followers: {followers}"
+        description += f" | ⏱️ Time taken: {duration_text}"
         
-        # Small delay between batches to be respectful
-        if i + monitoring_config['batch_size'] < len(accounts_data):
-            await asyncio.sleep(1)
+        embed = discord.Embed(
+            title="Monitoring Status",
+            description=description,
+            color=0x00ff00,
+            timestamp=current_time
+        )
+        embed.set_footer(text="Instagram Monitor Bot")
+    else:
+        # Fallback
+        embed = discord.Embed(
+            title="Monitoring Status",
+            description=f"@{username} status update",
+            color=0x0099ff,
+            timestamp=current_time
+        )
     
-    return all_results
+    return embed
 
 async def send_optimized_notification(channel, username, data, result, current_time, notification_type):
-    """Send notification matching screenshot format exactly"""
+    """Queue a notification matching screenshot format exactly"""
     try:
-        if notification_type == "banned":
-            # Match screenshot format: "Success! @username has been banned! ❌"
-            embed = discord.Embed(
-                title="Monitoring Status",
-                description=f"Success! @{username} has been banned! ❌",
-                color=0xff0000,
-                timestamp=current_time
-            )
-            embed.set_footer(text="Instagram Monitor Bot")
-            
-        elif notification_type in ["recovered", "unbanned"]:
-            # Match screenshot format: "Account Recovered | @username ✅✔️ | Followers: 1381 | ⏱️ Time taken: 16 hours, 22 minutes, 14 seconds"
-            duration_text = calculate_duration(data.get('added_at'), current_time)
-            
-            # Get follower count from result or initial data
-            initial_data = data.get('initial_data', {})
-            followers = result.get('followers', 0) or initial_data.get('followers', 0)
+        embed = build_notification_embed(username, data, result, current_time, notification_type)
+        notification_dispatcher.enqueue(channel, [embed], NotificationDispatcher.PRIORITY_ALERT)
+        return 1
+    except Exception as e:
+        print(f"❌ Error queueing notification: {e}")
+        return 0
+
+def build_digest_summary_embed(transitions, current_time):
+    """Build one compact embed summarising many transitions for a channel"""
+    icons = {'banned': '❌', 'recovered': '✅', 'unbanned': '✅'}
+    labels = {'banned': 'banned', 'recovered': 'recovered', 'unbanned': 'unbanned'}
+    
+    counts = {}
+    lines = []
+    for username, _, _, notification_type in transitions:
+        counts[notification_type] = counts.get(notification_type, 0) + 1
+        lines.append(f"{icons.get(notification_type, '🔄')} @{username} {labels.get(notification_type, 'status update')}")
+    
+    # Embed descriptions are capped at 4096 characters
+    description = ""
+    for index, line in enumerate(lines):
+        remaining = len(lines) - index
+        if len(description) + len(line) + 40 > 4096:
+            description += f"... and {remaining} more"
+            break
+        description += line + "\n"
+    
+    if set(counts) == {'banned'}:
+        color = 0xff0000
+    elif 'banned' not in counts:
+        color = 0x00ff00
+    else:
+        color = 0xffa500
+    
+    embed = discord.Embed(
+        title=f"Monitoring Status - {len(transitions)} changes",
+        description=description.strip(),
+        color=color,
+        timestamp=current_time
+    )
+    summary = " | ".join(f"{labels.get(kind, kind).title()}: {count}" for kind, count in counts.items())
+    embed.set_footer(text=f"Instagram Monitor Bot | {summary}")
+    return embed
+
+async def send_notification_digest(channel, transitions, current_time):
+    """Queue all transitions found for one channel in a cycle, batching when the volume is high"""
+    mode = monitoring_config['notification_mode']
+    count = len(transitions)
+    
+    if mode == 'account' or (mode == 'auto' and count <= monitoring_config['digest_threshold']):
+        sent = 0
+        for username, data, result, notification_type in transitions:
+            sent += await send_optimized_notification(channel, username, data, result, current_time, notification_type)
+        return sent
+    
+    try:
+        if count > monitoring_config['summary_threshold']:
+            notification_dispatcher.enqueue(channel, [build_digest_summary_embed(transitions, current_time)])
+            return count
+        
+        embeds = [
+            build_notification_embed(username, data, result, current_time, notification_type)
+            for username, data, result, notification_type in transitions
+        ]
+        per_message = max(1, min(10, monitoring_config['embeds_per_message']))
+        for i in range(0, len(embeds), per_message):
+            notification_dispatcher.enqueue(channel, embeds[i:i + per_message])
+        return count
+    except Exception as e:
+        print(f"❌ Error queueing notification digest: {e}")
+        return 0
+
+async def flush_notification_digests(pending_notifications, current_time):
+    """Send the transitions collected during a cycle, grouped per target channel"""
+    notifications_sent = 0
+    for channel, transitions in pending_notifications.values():
+        notifications_sent += await send_notification_digest(channel, transitions, current_time)
+    pending_notifications.clear()
+    return notifications_sent
+
+def detect_transition(account_type, previous_status, current_status):
+    """Return the notification type for a status change on a ban/unban watch, or None
+
+    Only a change between two definitive statuses counts - coming from error, rate_limited or
+    unknown, the watch simply learns its status.
+    """
+    definitive_statuses = ['active_public', 'active_private', 'not_found', 'banned']
+    if previous_status not in definitive_statuses or current_status not in definitive_statuses:
+        return None
+    active_statuses = ['active_public', 'active_private']
+    was_active = previous_status in active_statuses
+    is_active = current_status in active_statuses
+    
+    if account_type == 'ban' and was_active and not is_active:
+        return "banned"
+    if account_type == 'ban' and not was_active and is_active:
+        return "recovered"
+    if account_type == 'unban' and not was_active and is_active:
+        return "unbanned"
+    return None
+
+async def fetch_coordinated_results(usernames, on_result=None):
+    """Register the watched usernames with the coordinator and take the results its workers published since last cycle"""
+    await asyncio.to_thread(check_coordinator.register, usernames)
+    published = await asyncio.to_thread(check_coordinator.get_results, usernames)
+    
+    results = {}
+    for username, (checked_at, result) in published.items():
+        checked_at = datetime.fromtimestamp(checked_at)
+        stored = monitoring_cache.get(f"check_{username}")
+        if stored and stored[0] >= checked_at:
+            continue  # Already applied
+        store_check_result(username, result, checked_at)
+        results[username] = result
+        if on_result:
+            await on_result(username, result)
+    return results
+
+class FairCheckQueue:
+    """Due checks queued per guild and handed out by deficit round robin, so no guild can starve the others"""
+    
+    MIN_WEIGHT = 0.1  # A guild never builds deficit without a positive weight, and pop would spin on it forever
+    
+    def __init__(self, weights=None, quota=None):
+        self.weights = {}
+        for guild_id, weight in (weights or {}).items():
+            if weight < self.MIN_WEIGHT:
+                print(f"⚠️ Guild weight {weight} for {guild_id} raised to {self.MIN_WEIGHT}")
+                weight = self.MIN_WEIGHT
+            self.weights[guild_id] = weight
+        self.quota = quota
+        self.queues = {}  # {guild_id: [(due, username)]} - heaps, earliest due first
+        self.order = deque()  # Round-robin order of guilds with queued checks
+        self.deficits = {}
+        self.pending = set()  # Usernames queued and not yet handed out
+        self.guilds_of = {}  # {username: guild_ids it is queued in}
+        self.handed_out = {}  # {guild_id: checks handed out this cycle}
+        self.over_quota = {}  # {guild_id: checks left for the next cycle by the quota}
+    
+    def push(self, guild_id, username, due):
+        """Queue a check for a guild; a username watched in several guilds is handed out once"""
+        queue = self.queues.get(guild_id)
+        if queue is None:
+            queue = self.queues[guild_id] = []
+            self.order.append(guild_id)
+            self.deficits[guild_id] = 0.0
+        heapq.heappush(queue, (due, username))
+        self.pending.add(username)
+        self.guilds_of.setdefault(username, set()).add(guild_id)
+    
+    def _close_guild(self, guild_id):
+        """The guild used its quota - what it still has queued waits for the next cycle, earliest due first then"""
+        self.order.remove(guild_id)
+        for _, username in self.queues.pop(guild_id):
+            if username not in self.pending:
+                continue
+            self.guilds_of[username].discard(guild_id)
+            self.over_quota[guild_id] = self.over_quota.get(guild_id, 0) + 1
+            if not self.guilds_of[username]:
+                self.pending.discard(username)  # No other guild will hand it out
+    
+    def _head(self, guild_id):
+        """Earliest check of a guild still pending, dropping ones another guild already handed out"""
+        queue = self.queues[guild_id]
+        while queue and queue[0][1] not in self.pending:
+            heapq.heappop(queue)
+        return queue[0] if queue else None
+    
+    def pop(self, elapsed):
+        """Return (username, guild_id, due) for the next check due by elapsed seconds, or None"""
+        idle = 0
+        while self.order and idle < len(self.order):
+            guild_id = self.order[0]
+            head = self._head(guild_id)
+            if head is None:
+                self.order.popleft()
+                self.deficits[guild_id] = 0.0
+                continue
+            if self.quota is not None and self.handed_out.get(guild_id, 0) >= self.quota:
+                self._close_guild(guild_id)
+                continue
+            if head[0] > elapsed:
+                self.order.rotate(-1)
+                idle += 1
+                continue
             
-            description = f"Account Recovered | @{username} ✅✔️"
-            if followers and int(followers) > 0:
-                description += f" | Followers: {followers}"
-            description += f" | ⏱️ Time taken: {duration_text}"
+            idle = 0
+            if self.deficits[guild_id] < 1:
+                self.deficits[guild_id] += self.weights.get(guild_id, 1)
+                if self.deficits[guild_id] < 1:
+                    self.order.rotate(-1)
+                    continue
             
-            embed = discord.Embed(
-                title="Monitoring Status",
-                description=description,
-                color=0x00ff00,
-                timestamp=current_time
-            )
-            embed.set_footer(text="Instagram Monitor Bot")
-        else:
-            # Fallback
-            embed = discord.Embed(
-                title="Monitoring Status",
-                description=f"@{username} status update",
-                color=0x0099ff,
-                timestamp=current_time
-            )
-        
-        # Send the notification
+            self.deficits[guild_id] -= 1
+            self.handed_out[guild_id] = self.handed_out.get(guild_id, 0) + 1
+            due, username = heapq.heappop(self.queues[guild_id])
+            self.pending.discard(username)
+            if self.deficits[guild_id] < 1:
+                self.order.rotate(-1)
+            return username, guild_id, due
+        return None
+    
+    def next_due(self):
+        """Seconds into the cycle when the earliest pending check is due, or None"""
+        heads = [head for head in (self._head(guild_id) for guild_id in list(self.order)) if head]
+        return min(head[0] for head in heads) if heads else None
+    
+    def backlog(self):
+        """{guild_id: checks not handed out this cycle}"""
+        backlog = dict(self.over_quota)
+        for guild_id, queue in self.queues.items():
+            remaining = sum(1 for _, username in queue if username in self.pending)
+            backlog[guild_id] = backlog.get(guild_id, 0) + remaining
+        return backlog
+
+class PipelineStage:
+    """One stage of the monitoring pipeline: a bounded queue drained by a fixed number of workers
+
+    A full queue makes the previous stage wait, so a slow stage holds back the stages before it
+    instead of piling up results. Each stage counts its items, busy time and deepest backlog.
+    """
+    
+    def __init__(self, name, handler, workers=1, maxsize=100, next_stage=None):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.queue = asyncio.Queue(maxsize)
+        self.next_stage = next_stage
+        self.tasks = []
+        self.processed = 0
+        self.seconds = 0.0
+        self.max_depth = 0
+    
+    def start(self):
+        self.tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+    
+    async def put(self, item):
+        await self.queue.put(item)
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+    
+    async def _work(self):
+        while True:
+            item = await self.queue.get()
+            started = time.monotonic()
+            try:
+                output = await self.handler(item)
+                self.processed += 1
+                self.seconds += time.monotonic() - started
+                if output is not None and self.next_stage:
+                    await self.next_stage.put(output)
+            except Exception as e:
+                print(f"❌ Error in {self.name} stage: {e}")
+            finally:
+                self.queue.task_done()
+    
+    async def drain(self):
+        """Wait for everything queued so far, then stop the workers"""
+        await self.queue.join()
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+    
+    def stats(self):
+        return {'processed': self.processed, 'seconds': self.seconds, 'max_depth': self.max_depth, 'workers': self.workers}
+
+async def fetch_cycle_results(usernames, due_in=None, on_result=None, guilds=None):
+    """Check each username once, concurrently up to the configured limits
+
+    due_in maps usernames to seconds until they are due (missing = due now); no check starts
+    before its due time. guilds maps usernames to the guilds watching them, which share the
+    cycle fairly. on_result is awaited with each result as it arrives.
+    """
+    if check_coordinator:
+        return await fetch_coordinated_results(usernames, on_result)
+    
+    due_in = due_in or {}
+    guilds = guilds or {}
+    results = {}
+    queue = FairCheckQueue(monitoring_config['guild_weights'], monitoring_config['guild_check_quota'])
+    for username in usernames:
+        for guild_id in guilds.get(username, [0]):
+            queue.push(guild_id, username, due_in.get(username, 0))
+    
+    # Spread the checks evenly over the pacing window instead of starting them all at once
+    interval = monitoring_config['check_interval']
+    window = interval * monitoring_config['pacing_window']
+    # A check started later than this could run past the interval even within its deadline
+    last_start = min(window, interval - monitoring_config['check_deadline'])
+    if last_start <= 0:
+        # A deadline as long as the interval leaves no start time that is sure to finish in it
+        print(f"⚠️ check_deadline {monitoring_config['check_deadline']}s doesn't fit a {interval}s interval - checks may overrun it")
+        last_start = window
+    cycle_start = time.monotonic()
+    in_flight = asyncio.Semaphore(check_concurrency())
+    cycle_lag = 0.0
+    cycle_guilds = {guild_id: {'checked': 0, 'backlog': 0, 'lag': 0.0} for guild_id in queue.queues}
+    
+    fetch_stats = {'processed': 0, 'seconds': 0.0, 'max_depth': 0, 'workers': check_concurrency()}
+    
+    async def fetch(username, use_cache):
+        started = time.monotonic()
         try:
-            await channel.send(embed=embed)
+            if use_cache:
+                results[username] = await check_account_cached(username, datetime.now())
+            else:
+                results[username] = await run_live_check(username)
+            record_check_latency(time.monotonic() - started)
+            fetch_stats['processed'] += 1
+            fetch_stats['seconds'] += time.monotonic() - started
+            if on_result:
+                await on_result(username, results[username])
         except Exception as e:
-            print(f"❌ Error sending notification: {e}")
-            return 0
+            print(f"Error checking {username}: {e}")
+        finally:
+            in_flight.release()
+    
+    tasks_started = []
+    target = cycle_start
+    while queue.pending:
+        delay = target - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
         
-        return 1
-    except Exception as e:
-        print(f"❌ Error sending notification: {e}")
-        return 0
+        elapsed = time.monotonic() - cycle_start
+        item = queue.pop(elapsed) if elapsed <= last_start else None
+        if item is None:
+            next_due = queue.next_due()
+            if elapsed > last_start or next_due is None or next_due > last_start:
+                break
+            # Nothing due yet - wait for the earliest check
+            await asyncio.sleep(max(0.0, next_due - elapsed))
+            target = time.monotonic()
+            continue
         
+        username, guild_id, due = item
+        await in_flight.acquire()
+        now = time.monotonic()
+        if now - cycle_start > last_start:
+            in_flight.release()
+            queue.push(guild_id, username, due)
+            break
+        
+        lag = max(0.0, now - target)
+        cycle_lag = max(cycle_lag, lag)
+        guild_stats = cycle_guilds[guild_id]
+        guild_stats['checked'] += 1
+        guild_stats['lag'] = max(guild_stats['lag'], now - cycle_start - max(due, 0))
+        # First cycle after a restart, or running behind: accounts with a fresh result are not refetched
+        shedding = lag > monitoring_config['pacing_max_lag']
+        use_cache = shedding or username in restored_check_results
+        restored_check_results.discard(username)
+        if shedding:
+            schedule_stats['shed'] += 1
+        tasks_started.append(asyncio.create_task(fetch(username, use_cache)))
+        fetch_stats['max_depth'] = max(fetch_stats['max_depth'], sum(1 for task in tasks_started if not task.done()))
+        
+        # Re-pace the remaining checks over what is left of the window, leaving a gap after the last one
+        # so it - jitter included - still starts inside the window
+        gap = max(0.0, cycle_start + window - now) / (len(queue.pending) + 1)
+        target = now + random.uniform(gap * (1 - monitoring_config['pacing_jitter']), gap)
+    
+    if queue.pending:
+        # Overrun - the rest stay overdue and go first in their guild next cycle, instead of letting ticks pile up
+        schedule_stats['overruns'] += 1
+        schedule_stats['deferred'] += len(queue.pending)
+        print(f"⏱️ Cycle overran {interval}s - deferred {len(queue.pending)} checks to the next cycle")
+    
+    await asyncio.gather(*tasks_started)
+    
+    for guild_id, backlog in queue.backlog().items():
+        cycle_guilds.setdefault(guild_id, {'checked': 0, 'backlog': 0, 'lag': 0.0})['backlog'] = backlog
+    guild_schedule_stats.clear()
+    guild_schedule_stats.update(cycle_guilds)
+    pipeline_stats['fetch'] = fetch_stats
+    
+    schedule_stats['cycles'] += 1
+    schedule_stats['max_lag'] = max(schedule_stats['max_lag'], cycle_lag)
+    schedule_stats['last_cycle_seconds'] = time.monotonic() - cycle_start
+    if cycle_lag > monitoring_config['pacing_max_lag'] / 2:
+        print(f"⏱️ Checks ran up to {cycle_lag:.1f}s behind schedule this cycle")
+    return results
+
+def transition_confirmation(account_type, data, observed_status, confirmation, notification_type):
+    """Return the confirmed status for a suspected transition on a watch, or None while it is unconfirmed
+
+    A change is confirmed by an immediate re-check that sees the same transition, or by the
+    next cycle seeing it again when the re-check failed. Otherwise it stays pending on the watch.
+    """
+    previous_status = data['last_status']
+    if confirmation and confirmation.get('status') in ['active_public', 'active_private', 'not_found', 'banned']:
+        if detect_transition(account_type, previous_status, confirmation['status']) == notification_type:
+            transition_stats['confirmed'] += 1
+            return confirmation['status']
+        # The re-check disagrees - a flaky result, nothing changes
+        transition_stats['rejected'] += 1
+        data.pop('pending_status', None)
+        data.pop('pending_since', None)
+        return None
+    
+    pending_status = data.get('pending_status')
+    if pending_status and detect_transition(account_type, previous_status, pending_status) == notification_type:
+        transition_stats['confirmed'] += 1
+        return pending_status
+    
+    # Re-check failed - wait for the next cycle to see the change again
+    transition_stats['pending'] += 1
+    data['pending_status'] = observed_status
+    data['pending_since'] = datetime.now().isoformat()
+    return None
+
+def seconds_until_due(data, current_time, interval):
+    """Seconds until a watch entry is due for its next check, from its persisted last_check"""
+    try:
+        last_check = datetime.fromisoformat(data['last_check'])
+    except (KeyError, TypeError, ValueError):
+        return 0  # Never checked - due now
+    return (last_check - current_time).total_seconds() + interval
+
+def save_pending_transitions(pending_notifications):
+    """Persist the transitions collected so far this cycle, so a restart still announces them"""
+    try:
+        entries = [
+            {'channel_id': channel_id, 'username': username, 'data': data, 'result': result, 'type': notification_type}
+            for channel_id, (_, transitions) in pending_notifications.items()
+            for username, data, result, notification_type in transitions
+        ]
+        temp_file = f"{monitoring_config['pending_transitions_file']}.{os.getpid()}.tmp"
+        with open(temp_file, 'w') as f:
+            json.dump(entries, f)
+        os.replace(temp_file, monitoring_config['pending_transitions_file'])
+    except Exception as e:
+        print(f"Error saving pending transitions: {e}")
+
+def load_pending_transitions(get_channel):
+    """Transitions a previous run collected but never announced, grouped per channel like queue_notification"""
+    try:
+        if not os.path.exists(monitoring_config['pending_transitions_file']):
+            return {}
+        with open(monitoring_config['pending_transitions_file'], 'r') as f:
+            entries = json.load(f)
+    except Exception as e:
+        print(f"Error loading pending transitions: {e}")
+        return {}
+    
+    pending_notifications = {}
+    for entry in entries:
+        channel = get_channel(entry.get('channel_id'))
+        if not channel:
+            continue
+        queue_notification(pending_notifications, channel, entry['username'], entry['data'], entry['result'], entry['type'])
+    return pending_notifications
+
+def queue_notification(pending_notifications, channel, username, data, result, notification_type):
+    """Collect a transition for its target channel until the end of the cycle"""
+    entry = pending_notifications.setdefault(channel.id, (channel, []))
+    # Snapshot the watch data so later updates in the cycle don't change the message
+    entry[1].append((username, dict(data), result, notification_type))
+
 async def send_monitoring_status(channel, username):
-    """Send monitoring status notification to general channel"""
+    """Queue monitoring status notification to general channel"""
     try:
         embed = discord.Embed(
             title="Monitoring Status",
@@ -1555,7 +3238,7 @@ async def send_monitoring_status(channel, username):
             timestamp=datetime.now()
         )
         embed.set_footer(text="Instagram Monitor Bot")
-        await channel.send(embed=embed)
+        notification_dispatcher.enqueue(channel, [embed], NotificationDispatcher.PRIORITY_CONFIRMATION)
         return True
     except Exception as e:
         print(f"❌ Error sending monitoring status: {e}")
@@ -1569,133 +3252,137 @@ async def background_monitor():
         notifications_sent = 0
         # Track notifications sent this cycle to prevent duplicates
         sent_notifications = set()  # Format: "username:status_change:channel_id"
+        # Transitions are grouped per target channel, saved at each checkpoint and announced at the end of the cycle
+        pending_notifications = {}  # {channel_id: (channel, [(username, data, result, type)])}
         
         # Debug - show total accounts being monitored  
         total_ban_accounts = sum(len(accounts) for accounts in ban_watch_list.values())
         total_unban_accounts = sum(len(accounts) for accounts in unban_watch_list.values()) 
-        print(f"[{current_time.strftime('%H:%M:%S')}] Monitoring: {total_ban_accounts} ban accounts, {total_unban_accounts} unban accounts")
+        suspended = f", {len(quarantined_channels)} channels quarantined" if quarantined_channels else ""
+        print(f"[{current_time.strftime('%H:%M:%S')}] Monitoring: {total_ban_accounts} ban accounts, {total_unban_accounts} unban accounts{suspended}")
         
-        # Check ban monitoring list
-        for channel_id, accounts in ban_watch_list.items():
-            try:
-                channel = bot.get_channel(channel_id)
+        # Collect the watches of live channels - quarantined channels are skipped entirely
+        watches = {}  # {username: [(channel, data, account_type)]}
+        for account_type, watch_list in [('ban', ban_watch_list), ('unban', unban_watch_list)]:
+            for channel_id, accounts in list(watch_list.items()):
+                channel = get_channel_route(channel_id)
                 if not channel:
-                    print(f"[{current_time.strftime('%H:%M:%S')}] ❌ Channel {channel_id} not found - use !setchannel command to set a valid channel")
-                    # Show available channels as a hint
-                    available_channels = [ch for ch in bot.get_all_channels() if hasattr(ch, 'send') and ch.type == discord.ChannelType.text]
-                    if available_channels and len(available_channels) <= 3:
-                        print(f"[{current_time.strftime('%H:%M:%S')}] 💡 Available channels: {', '.join([f'{ch.name} ({ch.id})' for ch in available_channels])}")
                     continue
-                # Check if channel supports sending messages
-                if not hasattr(channel, 'send'):
-                    print(f"[{current_time.strftime('%H:%M:%S')}] Warning: Channel {channel_id} cannot send messages")
-                    continue
-            except Exception as e:
-                print(f"[{current_time.strftime('%H:%M:%S')}] Error accessing channel {channel_id}: {e}")
-                continue
-            
-            for username, data in accounts.items():
+                for username, data in list(accounts.items()):
+                    watches.setdefault(username, []).append((channel, data, account_type))
+        
+        # Resume each account's schedule from its persisted last_check - accounts due within this cycle's
+        # pacing window are checked at their due time, the rest wait for a later cycle
+        interval = monitoring_config['check_interval']
+        window = interval * monitoring_config['pacing_window']
+        due_in = {}
+        for username, entries in watches.items():
+            due_in[username] = min(seconds_until_due(data, current_time, interval) for _, data, _ in entries)
+        due_usernames = {username for username, seconds in due_in.items() if seconds < window}
+        # Guilds share each cycle fairly, however many accounts one of them watches
+        guilds = {
+            username: list({getattr(getattr(channel, 'guild', None), 'id', 0) for channel, _, _ in watches[username]})
+            for username in due_usernames
+        }
+        
+        checkpoint = {'at': time.monotonic(), 'applied': 0}
+        
+        async def save_checkpoint():
+            """Save progress so a restart resumes mid-cycle - collected transitions are kept for the cycle's digests"""
+            save_pending_transitions(pending_notifications)
+            save_monitoring_data()
+            checkpoint['at'] = time.monotonic()
+        
+        # Results flow fetch → classify → diff → notify through bounded queues
+        async def classify(item):
+            """Decide whether a result suggests a ban or recovery, confirming it with an immediate re-check"""
+            username, result = item
+            current_status = result['status']
+            confirmation = None
+            if current_status in ['active_public', 'active_private', 'not_found', 'banned'] and any(detect_transition(account_type, data['last_status'], current_status) for _, data, account_type in watches.get(username, [])):
                 try:
-                    # Check account status
-                    result = monitor.check_username_status(username)
-                    previous_status = data['last_status']
-                    current_status = result['status']
-                    
-                    if previous_status != current_status:
-                        print(f"[{current_time.strftime('%H:%M:%S')}] BAN MONITOR {username}: {previous_status} -> {current_status}")
-                    
-                    # Update data
-                    data['last_status'] = current_status
-                    data['last_check'] = current_time.isoformat()
-                    
-                    # Simplified ban detection: active → any other status = banned
-                    active_statuses = ['active_public', 'active_private']
-                    
-                    # Check for ban (active → any other status) 
-                    if (previous_status in active_statuses and current_status not in active_statuses):
-                        notification_key = f"{username}:banned"
-                        if notification_key not in sent_notifications:
-                            # Use dedicated ban channel if set, otherwise use monitoring channel
-                            target_channel = bot.get_channel(ban_notification_channel_id) if ban_notification_channel_id else channel
-                            if target_channel:
-                                sent_count = await send_optimized_notification(
-                                    target_channel, username, data, result, current_time, "banned"
-                                )
-                                notifications_sent += sent_count
-                                sent_notifications.add(notification_key)
-                    
-                    # Check for recovery (any other status → active) - Only notify once per username per cycle
-                    elif (previous_status not in active_statuses and current_status in active_statuses):
-                        notification_key = f"{username}:recovered"
-                        if notification_key not in sent_notifications:
-                            # Use dedicated unban channel if set, otherwise use monitoring channel
-                            target_channel = bot.get_channel(unban_notification_channel_id) if unban_notification_channel_id else channel
-                            if target_channel:
-                                sent_count = await send_optimized_notification(
-                                    target_channel, username, data, result, current_time, "recovered"
-                                )
-                                notifications_sent += sent_count
-                                sent_notifications.add(notification_key)
-                    
-                    # Small delay between checks
-                    await asyncio.sleep(0.5)
-                    
+                    confirmation = await run_confirmation_check(username, result.get('method'))
                 except Exception as e:
-                    print(f"Error checking {username}: {e}")
+                    print(f"Error confirming {username}: {e}")
+            return username, result, confirmation
         
-        # Check unban monitoring list
-        for channel_id, accounts in unban_watch_list.items():
-            try:
-                channel = bot.get_channel(channel_id)
-                if not channel:
-                    print(f"[{current_time.strftime('%H:%M:%S')}] ❌ Unban channel {channel_id} not found - use !setchannel command to set a valid channel")
-                    continue
-                if not hasattr(channel, 'send'):
-                    print(f"[{current_time.strftime('%H:%M:%S')}] Warning: Unban channel {channel_id} cannot send messages")
-                    continue
-            except Exception as e:
-                print(f"[{current_time.strftime('%H:%M:%S')}] Error accessing unban channel {channel_id}: {e}")
-                continue
-            
-            for username, data in accounts.items():
+        async def diff(item):
+            """Apply a classified result to every watch of the username, returning the transitions to announce"""
+            username, result, confirmation = item
+            current_status = result['status']
+            transitions = []
+            for channel, data, account_type in watches.get(username, []):
                 try:
-                    # Check account status
-                    result = monitor.check_username_status(username)
                     previous_status = data['last_status']
-                    current_status = result['status']
+                    data['last_check'] = datetime.now().isoformat()
                     
-                    if previous_status != current_status:
-                        print(f"[{current_time.strftime('%H:%M:%S')}] UNBAN MONITOR {username}: {previous_status} -> {current_status}")
-                    
-                    # Update data
-                    data['last_status'] = current_status
-                    data['last_check'] = current_time.isoformat()
+                    # A failed check never replaces a known status
+                    if current_status not in ['active_public', 'active_private', 'not_found', 'banned']:
+                        continue
                     
-                    # Simplified unban detection: any other status → active = unbanned
-                    active_statuses = ['active_public', 'active_private']
+                    # Ban watches: active → any other status = banned, any other status → active = recovered
+                    # Unban watches: any other status → active = unbanned
+                    new_status = current_status
+                    notification_type = detect_transition(account_type, previous_status, current_status)
+                    if notification_type:
+                        new_status = transition_confirmation(account_type, data, current_status, confirmation, notification_type)
+                        if not new_status:
+                            continue
                     
-                    if (previous_status not in active_statuses and current_status in active_statuses):
-                        # Check if we already sent a recovery notification for this username in this cycle
-                        notification_key = f"{username}:unbanned"
-                        if notification_key not in sent_notifications:
-                            # Use dedicated unban channel if set, otherwise use monitoring channel
-                            target_channel = bot.get_channel(unban_notification_channel_id) if unban_notification_channel_id else channel
-                            if target_channel:
-                                sent_count = await send_optimized_notification(
-                                    target_channel, username, data, result, current_time, "unbanned"
-                                )
-                                notifications_sent += sent_count
-                                sent_notifications.add(notification_key)
+                    if previous_status != new_status:
+                        print(f"[{datetime.now().strftime('%H:%M:%S')}] {account_type.upper()} MONITOR {username}: {previous_status} -> {new_status}")
                     
-                    # Small delay between checks
-                    await asyncio.sleep(0.5)
+                    # Update data
+                    data['last_status'] = new_status
+                    data.pop('pending_status', None)
+                    data.pop('pending_since', None)
+                    if notification_type:
+                        transitions.append((channel, data, confirmation or result, notification_type))
                     
                 except Exception as e:
                     print(f"Error checking {username}: {e}")
+            return username, transitions
         
-        # Save data after all checks
-        save_monitoring_data()
-        print(f"[{current_time.strftime('%H:%M:%S')}] Background monitoring completed. Sent {notifications_sent} notifications")
+        async def notify(item):
+            """Collect announcements per target channel and checkpoint progress periodically"""
+            username, transitions = item
+            for channel, data, result, notification_type in transitions:
+                # Use the guild's dedicated ban/unban channel if set, otherwise use monitoring channel
+                target_channel = get_notification_channel(channel, 'ban' if notification_type == "banned" else 'unban')
+                # Only notify once per username and target channel per cycle
+                notification_key = f"{username}:{notification_type}:{target_channel.id}"
+                if notification_key not in sent_notifications:
+                    queue_notification(pending_notifications, target_channel, username, data, result, notification_type)
+                    sent_notifications.add(notification_key)
+            
+            checkpoint['applied'] += 1
+            if time.monotonic() - checkpoint['at'] >= monitoring_config['checkpoint_interval']:
+                await save_checkpoint()
+        
+        queue_size = monitoring_config['pipeline_queue_size']
+        notify_stage = PipelineStage('notify', notify, 1, queue_size)
+        diff_stage = PipelineStage('diff', diff, 1, queue_size, notify_stage)
+        classify_stage = PipelineStage('classify', classify, monitoring_config['confirmation_workers'], queue_size, diff_stage)
+        stages = [classify_stage, diff_stage, notify_stage]
+        for stage in stages:
+            stage.start()
+        
+        async def hand_to_pipeline(username, result):
+            await classify_stage.put((username, result))
+        
+        # Check every due username once - in worker processes when a job queue or coordinator is configured
+        try:
+            await fetch_cycle_results(due_usernames, due_in, hand_to_pipeline, guilds)
+        finally:
+            for stage in stages:
+                await stage.drain()
+                pipeline_stats[stage.name] = stage.stats()
+        
+        # Announce the cycle's transitions in one batch per channel, then save data after all checks
+        notifications_sent += await flush_notification_digests(pending_notifications, current_time)
+        await save_checkpoint()
+        save_result_cache()
+        print(f"[{current_time.strftime('%H:%M:%S')}] Background monitoring completed. Checked {checkpoint['applied']} of {len(watches)} accounts ({len(watches) - len(due_usernames)} not due yet). Queued {notifications_sent} notifications ({notification_dispatcher.pending_count()} pending delivery)")
     
     except Exception as e:
         current_time = datetime.now()
@@ -1737,7 +3424,17 @@ if __name__ == "__main__":
         print(f"{Fore.YELLOW}Please add your Discord bot token to Replit Secrets.")
         exit(1)
     
+    if shard_config['shard_ids'] and not shard_config['shard_count']:
+        print(f"{Fore.RED}❌ BOT_SHARD_IDS requires BOT_SHARD_COUNT to be set as well!")
+        exit(1)
+    
     print(f"{Fore.CYAN}🚀 Starting Instagram Monitor Discord Bot...")
+    if is_partitioned():
+        print(f"{Fore.WHITE}Sharded mode: shards {shard_config['shard_ids']} of {shard_config['shard_count']}")
+    elif shard_config['sharded']:
+        print(f"{Fore.WHITE}Sharded mode: all shards in this process")
+    if shared_result_cache:
+        print(f"{Fore.WHITE}Shared result cache: {shard_config['shared_cache_path']}")
     print(f"{Fore.WHITE}Features: Real-time ban/unban monitoring, profile tracking, advanced notifications")
     
     try:
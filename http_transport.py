@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Instagram HTTP Transport
+Pooled, pre-warmed HTTP sessions for the monitors, with optional HTTP/2 multiplexing through httpx
+"""
+
+import socket
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+try:
+    import httpx  # HTTP/2 transport - also needs the h2 package
+    import h2
+except ImportError:
+    httpx = None
+
+try:
+    import brotli  # Both requests and httpx decode br only with brotli or brotlicffi installed
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+# Hosts every check talks to - worth having a connection open to before the first check
+INSTAGRAM_HOSTS = ('www.instagram.com', 'i.instagram.com')
+
+# Only advertise encodings we can decode - a br body we can't decompress reads as garbage
+ACCEPT_ENCODING = 'gzip, deflate, br' if brotli is not None else 'gzip, deflate'
+
+
+class ConnectionStats:
+    """How many requests a session sent and how many of them needed a new connection"""
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0  # Connections opened - each one paid for DNS, TCP and a TLS handshake
+
+    def request_sent(self):
+        with self.lock:
+            self.requests += 1
+
+    def connection_opened(self):
+        with self.lock:
+            self.connections += 1
+
+    def stats(self):
+        """Request, connection and reuse counters"""
+        with self.lock:
+            requests_sent, connections = self.requests, self.connections
+        reused = max(0, requests_sent - connections)
+        return {
+            'transport': self.transport,
+            'requests': requests_sent,
+            'connections': connections,
+            'reused': reused,
+            'reuse_rate': reused / requests_sent if requests_sent else 0.0
+        }
+
+
+class BandwidthMeter:
+    """Bytes each check method transfers, per method and outcome
+
+    measure() runs one method and charges it for the responses its thread received meanwhile;
+    a nested measure() keeps its responses to itself. Sizes are body bytes: compressed as they
+    came over the wire, and decompressed as the monitor parsed them.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.totals = {}  # {(method, outcome): [calls, responses, compressed bytes, decompressed bytes]}
+
+    def track(self, response, *args, **kwargs):
+        """Note a response for the method running on this thread - usable as a requests response hook"""
+        responses = getattr(self.local, 'responses', None)
+        if responses is not None:
+            responses.append(response)
+
+    def measure(self, method, func, *args, **kwargs):
+        """Call func(*args, **kwargs) and record what its responses cost under method and its outcome"""
+        outer = getattr(self.local, 'responses', None)
+        self.local.responses = []
+        outcome = 'exception'
+        try:
+            result = func(*args, **kwargs)
+            outcome = result_outcome(result)
+            return result
+        finally:
+            responses, self.local.responses = self.local.responses, outer
+            self.record(method, outcome, responses)
+
+    def record(self, method, outcome, responses):
+        sizes = [response_sizes(response) for response in responses]
+        with self.lock:
+            entry = self.totals.setdefault((method, outcome), [0, 0, 0, 0])
+            entry[0] += 1
+            entry[1] += len(sizes)
+            entry[2] += sum(compressed for compressed, _ in sizes)
+            entry[3] += sum(decompressed for _, decompressed in sizes)
+
+    def stats(self):
+        """{method: {outcome: {calls, responses, compressed, decompressed}}}"""
+        with self.lock:
+            totals = {key: list(entry) for key, entry in self.totals.items()}
+        methods = {}
+        for (method, outcome), (calls, responses, compressed, decompressed) in sorted(totals.items()):
+            methods.setdefault(method, {})[outcome] = {
+                'calls': calls,
+                'responses': responses,
+                'compressed': compressed,
+                'decompressed': decompressed
+            }
+        return methods
+
+    def summary(self):
+        """Per method: (calls, compressed bytes, decompressed bytes) over all outcomes"""
+        summary = {}
+        for method, outcomes in self.stats().items():
+            summary[method] = tuple(
+                sum(entry[field] for entry in outcomes.values()) for field in ('calls', 'compressed', 'decompressed')
+            )
+        return summary
+
+
+def result_outcome(result):
+    """Status of a check method's result - a dict with 'status' or a (status, data) tuple"""
+    if isinstance(result, dict):
+        return result.get('status') or 'unknown'
+    if isinstance(result, (tuple, list)) and result:
+        return str(result[0])
+    return 'none' if result is None else str(result)
+
+
+def response_sizes(response):
+    """(bytes over the wire, bytes after decompression) for a response's body"""
+    try:
+        decompressed = len(response.content)
+    except Exception:
+        decompressed = 0  # Body never read, e.g. the connection dropped mid-download
+    if hasattr(response, 'num_bytes_downloaded'):  # httpx
+        return response.num_bytes_downloaded, decompressed
+    raw = getattr(response, 'raw', None)
+    try:
+        compressed = raw.tell() if raw is not None else decompressed  # urllib3 counts what it read off the socket
+    except Exception:
+        compressed = decompressed
+    return compressed or decompressed, decompressed
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """requests adapter that counts the connections its pools open"""
+
+    def __init__(self, connection_stats, **kwargs):
+        self.connection_stats = connection_stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        stats = self.connection_stats
+
+        class CountingHTTPConnectionPool(HTTPConnectionPool):
+            def _new_conn(self):
+                stats.connection_opened()
+                return super()._new_conn()
+
+        class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+            def _new_conn(self):
+                stats.connection_opened()
+                return super()._new_conn()
+
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': CountingHTTPConnectionPool,
+            'https': CountingHTTPSConnectionPool
+        }
+
+    def send(self, request, **kwargs):
+        self.connection_stats.request_sent()
+        return super().send(request, **kwargs)
+
+
+class HTTP2Session:
+    """The parts of requests.Session the monitors use, over an httpx client speaking HTTP/2
+
+    Concurrent checks share a few long-lived connections as multiplexed streams instead of each
+    holding a connection of its own. httpx errors come out as the matching requests exceptions,
+    so the monitors' error handling works unchanged.
+    """
+
+    def __init__(self, pool_size=10, keepalive=300):
+        self.connection_stats = ConnectionStats('http2')
+        self.bandwidth = BandwidthMeter()
+        self.client = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size, keepalive_expiry=keepalive)
+        )
+
+    @property
+    def headers(self):
+        return self.client.headers
+
+    @property
+    def cookies(self):
+        return self.client.cookies
+
+    def _trace(self, event, info):
+        if event == 'connection.connect_tcp.complete':
+            self.connection_stats.connection_opened()
+
+    def request(self, method, url, headers=None, data=None, timeout=None, allow_redirects=True, **kwargs):
+        self.connection_stats.request_sent()
+        try:
+            response = self.client.request(
+                method, url, headers=headers, data=data, timeout=timeout,
+                follow_redirects=allow_redirects, extensions={'trace': self._trace}, **kwargs
+            )
+            self.bandwidth.track(response)
+            return response
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+        except httpx.HTTPError as e:
+            raise requests.exceptions.RequestException(str(e)) from e
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def head(self, url, **kwargs):
+        kwargs.setdefault('allow_redirects', False)
+        return self.request('HEAD', url, **kwargs)
+
+    def post(self, url, data=None, **kwargs):
+        return self.request('POST', url, data=data, **kwargs)
+
+    def close(self):
+        self.client.close()
+
+
+def open_http_session(transport='http1', pool_size=10):
+    """Session for Instagram requests: 'http1' for a pooled requests.Session, 'http2' for httpx when installed
+
+    Either way the session has a connection_stats attribute with its connection reuse counters
+    and a bandwidth attribute metering what each check method downloads.
+    """
+    if transport == 'http2':
+        if httpx is not None:
+            return HTTP2Session(pool_size)
+        print("HTTP/2 transport needs 'httpx[http2]' - falling back to HTTP/1.1")
+
+    session = requests.Session()
+    session.connection_stats = ConnectionStats('http1')
+    session.bandwidth = BandwidthMeter()
+    session.hooks['response'].append(session.bandwidth.track)
+    adapter = CountingHTTPAdapter(
+        session.connection_stats,
+        pool_connections=len(INSTAGRAM_HOSTS),
+        pool_maxsize=pool_size,
+        max_retries=0  # The monitors handle retries themselves
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def warm_up(session, hosts=INSTAGRAM_HOSTS, timeout=5):
+    """Resolve each host and open a connection to it, so the first checks skip DNS and the TLS handshake
+
+    Returns {host: seconds taken} - None for hosts that could not be reached.
+    """
+    timings = {}
+    for host in hosts:
+        started = time.monotonic()
+        try:
+            socket.getaddrinfo(host, 443, proto=socket.IPPROTO_TCP)
+            session.head(f"https://{host}/", timeout=timeout, allow_redirects=False)
+            timings[host] = time.monotonic() - started
+        except (OSError, requests.exceptions.RequestException):
+            timings[host] = None
+    return timings
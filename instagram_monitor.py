@@ -4,7 +4,6 @@ Enhanced Instagram Username Status Monitor
 Educational project for monitoring Instagram username status with advanced features
 """
 
-import requests
 import time
 import json
 import os
@@ -16,6 +15,8 @@ from bs4 import BeautifulSoup
 import sys
 from urllib.parse import quote
 import threading
+from result_cache import open_result_cache
+from http_transport import open_http_session, warm_up, ACCEPT_ENCODING
 # from fake_useragent import UserAgent  # Optional import
 
 # Initialize colorama for colored output
@@ -23,18 +24,8 @@ init(autoreset=True)
 
 class EnhancedInstagramMonitor:
     def __init__(self):
-        # Initialize session with connection pooling
-        self.session = requests.Session()
-        self.session.adapters.clear()
-        
-        # Add connection pooling adapter
-        adapter = requests.adapters.HTTPAdapter(
-            pool_connections=2,
-            pool_maxsize=5,
-            max_retries=0  # We handle retries manually
-        )
-        self.session.mount('http://', adapter)
-        self.session.mount('https://', adapter)
+        # Initialize session with connection pooling (INSTAGRAM_TRANSPORT=http2 multiplexes over httpx)
+        self.session = open_http_session(os.getenv('INSTAGRAM_TRANSPORT', 'http1'), pool_size=5)
         
         # Enhanced user agent rotation with better mobile support
         self.user_agents = [
@@ -53,6 +44,11 @@ class EnhancedInstagramMonitor:
         self.load_previous_status()
         self.load_rate_limit_data()
         
+        # Results shared with other monitor processes on this host (SHARED_RESULT_CACHE: SQLite path or shm://name)
+        shared_cache_path = os.getenv('SHARED_RESULT_CACHE')
+        self.shared_cache = open_result_cache(shared_cache_path) if shared_cache_path else None
+        self.shared_cache_ttl = 90
+        
         # Initialize logging
         self.setup_logging()
     
@@ -108,7 +104,9 @@ class EnhancedInstagramMonitor:
             'rate_limited_count': self.rate_limited_count,
             'consecutive_failures': self.consecutive_failures,
             'simulation_mode': self.simulation_mode,
-            'recent_requests_per_hour': len(self.request_history)
+            'recent_requests_per_hour': len(self.request_history),
+            'connections': self.session.connection_stats.stats(),
+            'bandwidth': self.session.bandwidth.stats()
         }
         
         # Enhanced tracking with better configuration
@@ -152,12 +150,12 @@ class EnhancedInstagramMonitor:
             'en-US,en;q=0.9,es;q=0.8'
         ]
         
-        self.session.headers.clear()
+        # Every rotated header is set each time, so updating in place keeps the transport's defaults
         self.session.headers.update({
             'User-Agent': ua,
             'Accept': random.choice(accept_values),
             'Accept-Language': random.choice(languages),
-            'Accept-Encoding': 'gzip, deflate, br',
+            'Accept-Encoding': ACCEPT_ENCODING,
             'Connection': 'keep-alive',
             'DNT': str(random.choice([0, 1])),
             'Sec-Fetch-Dest': 'document',
@@ -549,7 +547,7 @@ class EnhancedInstagramMonitor:
         # Try checking methods in order of reliability
         for method_name, method in self.get_checking_methods().items():
             try:
-                result = method(username)
+                result = self.session.bandwidth.measure(method_name, method, username)
                 if self.is_successful_result(result):
                     self.successful_requests += 1
                     self.consecutive_failures = 0
@@ -569,6 +567,22 @@ class EnhancedInstagramMonitor:
         print(f"{Fore.RED}🚫 All methods failed for @{username}")
         return "error", None
     
+    def check_username_shared(self, username):
+        """Check a username, reusing a recent result from another monitor process on this host"""
+        if self.shared_cache:
+            cached = self.shared_cache.get(username, self.shared_cache_ttl)
+            if cached:
+                result = cached[1]
+                profile_data = {key: value for key, value in result.items() if key not in ('status', 'reason')}
+                print(f"{Fore.GREEN}♻️ Reused a result from another process for @{username}")
+                return result['status'], profile_data or None
+        
+        status, profile_data = self.check_username_optimized(username)
+        # Simulated results must never reach the other processes
+        if self.shared_cache and not self.simulation_mode and status in ['active_public', 'active_private', 'not_found', 'banned']:
+            self.shared_cache.put(username, {'status': status, **(profile_data or {})})
+        return status, profile_data
+    
     def should_use_simulation(self):
         """Determine if simulation mode should be used"""
         return (self.rate_limited_count >= 2 or 
@@ -861,6 +875,12 @@ class EnhancedInstagramMonitor:
         current_status = {}
         cycle_count = 0
         
+        if not self.simulation_mode:
+            timings = warm_up(self.session)
+            print(f"{Fore.WHITE}🔌 Connections warmed: " + ", ".join(
+                f"{host} {seconds:.2f}s" if seconds is not None else f"{host} unreachable" for host, seconds in timings.items()
+            ))
+        
         while True:
             try:
                 cycle_count += 1
@@ -870,12 +890,16 @@ class EnhancedInstagramMonitor:
                     print(f"{Fore.CYAN}📚 Running in educational simulation mode")
                 else:
                     success_rate = self.successful_requests / max(1, self.successful_requests + self.failed_requests)
-                    print(f"{Fore.WHITE}📊 Success rate: {success_rate:.1%} | Requests: {self.request_count}")
+                    connections = self.session.connection_stats.stats()
+                    print(f"{Fore.WHITE}📊 Success rate: {success_rate:.1%} | Requests: {self.request_count} | "
+                          f"Connections: {connections['connections']} opened, {connections['reuse_rate']:.0%} reused ({connections['transport']})")
+                    for method_name, (calls, compressed, decompressed) in self.session.bandwidth.summary().items():
+                        print(f"{Fore.WHITE}📦 {method_name}: {calls} calls, {compressed / 1024:.1f} KB wire / {decompressed / 1024:.1f} KB body")
                 
                 for i, username in enumerate(usernames):
                     print(f"\n{Fore.CYAN}🔍 Checking @{username}... ({i+1}/{len(usernames)})")
                     
-                    status, profile_data = self.check_username_with_minimal_detection(username)
+                    status, profile_data = self.check_username_shared(username)
                     previous = self.previous_status.get(username, {})
                     
                     current_status[username] = {
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Shared Check Result Cache
+Lets several monitor processes on one host reuse each other's recent Instagram checks
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import fcntl  # Serializes writers from different processes
+except ImportError:
+    fcntl = None
+
+
+class TimedLRUCache:
+    """In-process cache with a size bound (least recently used entries go first) and per-entry TTLs
+
+    Expiry runs on monotonic time through a timing wheel: each entry sits in the slot of the tick it
+    expires on, and every access only visits the slots for ticks that have passed since the last one.
+    """
+
+    def __init__(self, max_entries=50000, default_ttl=3600, resolution=1.0, wheel_slots=512):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.resolution = resolution  # Seconds per wheel tick
+        self.entries = OrderedDict()  # {key: (value, stored_at, expire_tick)} - oldest use first
+        self.wheel = [set() for _ in range(wheel_slots)]
+        self.current_tick = self._tick(time.monotonic())
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0  # Dropped to stay within max_entries
+        self.expirations = 0  # Dropped because their TTL ran out
+
+    def _tick(self, moment):
+        return int(moment // self.resolution)
+
+    def _advance(self):
+        """Expire the entries of every tick that passed since the last access"""
+        now_tick = self._tick(time.monotonic())
+        if now_tick <= self.current_tick:
+            return
+        # Past one full turn every slot is due - visit each once
+        ticks = range(max(self.current_tick + 1, now_tick - len(self.wheel) + 1), now_tick + 1)
+        for tick in ticks:
+            slot = self.wheel[tick % len(self.wheel)]
+            for key in list(slot):
+                entry = self.entries.get(key)
+                if entry is None or entry[2] % len(self.wheel) != tick % len(self.wheel):
+                    slot.discard(key)  # Removed or re-stored into another slot since
+                elif entry[2] <= now_tick:
+                    slot.discard(key)
+                    del self.entries[key]
+                    self.expirations += 1
+        self.current_tick = now_tick
+
+    def set(self, key, value, ttl=None, age=0):
+        """Store a value for ttl seconds; age says how old it already is"""
+        self._advance()
+        now = time.monotonic()
+        stored_at = now - max(0, age)
+        expire_tick = self._tick(stored_at + (self.default_ttl if ttl is None else ttl))
+        if expire_tick <= self.current_tick:
+            self.delete(key)
+            return
+        
+        self.entries[key] = (value, stored_at, expire_tick)
+        self.entries.move_to_end(key)
+        self.wheel[expire_tick % len(self.wheel)].add(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key, default=None, max_age=None):
+        """Return a live value (no older than max_age seconds, if given) and mark it recently used
+
+        max_age may also be a function of the stored value, for freshness that depends on the value.
+        """
+        self._advance()
+        entry = self.entries.get(key)
+        if entry is not None and callable(max_age):
+            max_age = max_age(entry[0])
+        if entry is None or (max_age is not None and time.monotonic() - entry[1] > max_age):
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def age(self, key):
+        """Seconds since a live value was stored, or None"""
+        self._advance()
+        entry = self.entries.get(key)
+        return None if entry is None else time.monotonic() - entry[1]
+
+    def delete(self, key):
+        """Drop a value - its wheel slot forgets it lazily"""
+        self.entries.pop(key, None)
+
+    def items(self):
+        """Live (key, value) pairs, least recently used first"""
+        self._advance()
+        return [(key, entry[0]) for key, entry in self.entries.items()]
+
+    def clear(self):
+        self.entries.clear()
+        for slot in self.wheel:
+            slot.clear()
+
+    def stats(self):
+        """Size and hit/miss/eviction counters"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
+
+    def __contains__(self, key):
+        self._advance()
+        return key in self.entries
+
+    def __getitem__(self, key):
+        self._advance()
+        return self.entries[key][0]
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __delitem__(self, key):
+        self.delete(key)
+
+    def __len__(self):
+        self._advance()
+        return len(self.entries)
+
+class SQLiteResultCache:
+    """Recent check results kept in a SQLite file that every process on the host can open"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS check_results ('
+            'username TEXT PRIMARY KEY, checked_at REAL NOT NULL, result TEXT NOT NULL)'
+        )
+        self.connection.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, username, max_age):
+        """Return (checked_at, result) if another process checked this username recently"""
+        try:
+            with self.lock:
+                row = self.connection.execute(
+                    'SELECT checked_at, result FROM check_results WHERE username = ?',
+                    (username.lower(),)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Shared cache read error: {e}")
+            return None
+
+        if row and time.time() - row[0] <= max_age:
+            self.hits += 1
+            return row[0], json.loads(row[1])
+        self.misses += 1
+        return None
+
+    def put(self, username, result, checked_at=None):
+        """Publish a check result for the other processes"""
+        try:
+            with self.lock:
+                self.connection.execute(
+                    'INSERT OR REPLACE INTO check_results (username, checked_at, result) VALUES (?, ?, ?)',
+                    (username.lower(), checked_at or time.time(), json.dumps(result))
+                )
+                self.connection.commit()
+        except sqlite3.Error as e:
+            print(f"Shared cache write error: {e}")
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self.lock:
+            self.connection.close()
+
+class SharedMemoryResultCache:
+    """Recent check results in a fixed-size slot table in a memory-mapped file, keyed by username hash
+
+    Readers never take a lock: each slot carries a sequence number that writers make odd while
+    they write, so a reader that sees an odd or changed sequence simply treats the slot as a miss.
+    """
+
+    MAGIC = b'IGRC0001'
+    HEADER = struct.Struct('<8sII')  # magic, slot count, slot size
+    SLOT_HEADER = struct.Struct('<IQdI')  # sequence, username hash, checked_at, payload length
+    SLOT_FIELDS = struct.Struct('<QdI')  # The slot header after its sequence
+
+    def __init__(self, name, slots=4096, slot_size=1024):
+        directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+        self.path = name if os.sep in name else os.path.join(directory, f"{name}.igcache")
+        self.lock = threading.Lock()  # Writers in this process; fcntl covers the other processes
+        self.hits = 0
+        self.misses = 0
+
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._lock_file()
+        try:
+            if os.fstat(self.fd).st_size < self.HEADER.size:
+                os.ftruncate(self.fd, self.HEADER.size + slots * slot_size)
+                os.pwrite(self.fd, self.HEADER.pack(self.MAGIC, slots, slot_size), 0)
+            magic, self.slots, self.slot_size = self.HEADER.unpack(os.pread(self.fd, self.HEADER.size, 0))
+            if magic != self.MAGIC:
+                raise ValueError(f"{self.path} is not a result cache file")
+        finally:
+            self._unlock_file()
+        self.map = mmap.mmap(self.fd, self.HEADER.size + self.slots * self.slot_size)
+
+    def _lock_file(self):
+        if fcntl:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+
+    def _unlock_file(self):
+        if fcntl:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def _locate(self, username):
+        """Return (username hash, slot offset) for a username"""
+        key = int.from_bytes(hashlib.blake2b(username.lower().encode(), digest_size=8).digest(), 'little')
+        return key, self.HEADER.size + (key % self.slots) * self.slot_size
+
+    def get(self, username, max_age):
+        """Return (checked_at, result) if a process on this host checked this username recently"""
+        key, offset = self._locate(username)
+        for _ in range(3):
+            sequence, slot_key, checked_at, length = self.SLOT_HEADER.unpack_from(self.map, offset)
+            if sequence % 2 or slot_key != key or length > self.slot_size - self.SLOT_HEADER.size:
+                if sequence % 2:
+                    continue  # A writer is mid-update - look again
+                break
+            payload = self.map[offset + self.SLOT_HEADER.size:offset + self.SLOT_HEADER.size + length]
+            if self.SLOT_HEADER.unpack_from(self.map, offset)[0] != sequence:
+                continue  # Overwritten while we read it
+            if time.time() - checked_at > max_age:
+                break
+            try:
+                stored_username, result = json.loads(payload)
+            except ValueError:
+                break
+            if stored_username != username.lower():
+                break  # Hash collision with another username
+            self.hits += 1
+            return checked_at, result
+        self.misses += 1
+        return None
+
+    def put(self, username, result, checked_at=None):
+        """Publish a check result for the other processes, replacing whatever shared its slot"""
+        payload = json.dumps([username.lower(), result], separators=(',', ':')).encode()
+        if len(payload) > self.slot_size - self.SLOT_HEADER.size:
+            return  # Too large for a slot - not worth sharing
+        key, offset = self._locate(username)
+        with self.lock:
+            self._lock_file()
+            try:
+                sequence = self.SLOT_HEADER.unpack_from(self.map, offset)[0]
+                # Odd sequence marks the slot as being written
+                struct.pack_into('<I', self.map, offset, (sequence + 1) & 0xFFFFFFFF)
+                self.map[offset + self.SLOT_HEADER.size:offset + self.SLOT_HEADER.size + len(payload)] = payload
+                self.SLOT_FIELDS.pack_into(self.map, offset + 4, key, checked_at or time.time(), len(payload))
+                # The even sequence goes last, on its own, so readers never pair it with half-written fields
+                struct.pack_into('<I', self.map, offset, (sequence + 2) & 0xFFFFFFFF)
+            finally:
+                self._unlock_file()
+
+    def close(self):
+        """Unmap the table - the file stays for the other processes"""
+        with self.lock:
+            self.map.close()
+            os.close(self.fd)
+
+def open_result_cache(location):
+    """Open the host's shared result cache: 'shm://name' for the memory-mapped table, otherwise a SQLite file path"""
+    if location.startswith('shm://'):
+        return SharedMemoryResultCache(location[len('shm://'):])
+    return SQLiteResultCache(location)